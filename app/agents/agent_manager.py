@@ -3,16 +3,31 @@ Gerenciador de agentes para o sistema
 """
 
 from crewai import Agent
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 import os
+from app.agents.llm import HedgeStats, build_llm
+from app.agents.tool_registry import ToolExecutor, ToolRegistry
+from app.utils.config import Config
 
 
 class AgentManager:
     """Classe para gerenciar agentes do sistema"""
 
-    def __init__(self):
+    def __init__(self, config: Optional[Config] = None, snapshot_store=None):
+        self.config = config or Config()
         self.agents: Dict[str, Agent] = {}
-        # Ferramentas disponíveis por tipo de agente (simplificado)
+        # Configurações salvas dos agentes (restauradas do SnapshotStore)
+        self.snapshot_store = None
+        self.agent_snapshots: Dict[str, Dict] = {}
+        # Incrementada a cada alteração dos agentes (usada pelos view models da UI)
+        self.version = 0
+        # LLM compartilhado pelos agentes; None usa o padrão do CrewAI
+        self.llm: Optional[Any] = None
+        self.llm_settings: Optional[Dict] = None
+        self.hedge_stats = HedgeStats()
+        # Implementações reais das ferramentas, com execução compartilhada
+        self.tool_registry = ToolRegistry(ToolExecutor.from_config(self.config))
+        # Ferramentas disponíveis por tipo de agente
         self.agent_tools: Dict[str, List[str]] = {
             "researcher": ["web_search", "pdf_reader"],
             "analyst": ["statistical_analysis"],
@@ -59,6 +74,46 @@ class AgentManager:
                 "backstory": "Profissional focado em manipulação e comparação de planilhas",
             },
         }
+        if self.config.llm_hedge_enabled:
+            self.configure_llm(self.config.default_model)
+        if snapshot_store is not None:
+            self.use_snapshot_store(snapshot_store)
+
+    def use_snapshot_store(self, snapshot_store) -> None:
+        """Passa a salvar os agentes no SnapshotStore e restaura os já salvos"""
+        self.snapshot_store = snapshot_store
+        self.agent_snapshots = snapshot_store.load_latest("agent")
+
+    def configure_llm(
+        self,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        fallback_model: Optional[str] = None,
+        hedge: Optional[bool] = None,
+    ) -> None:
+        """Define o LLM dos agentes (modelo, temperatura e hedge)"""
+        settings = {
+            "model": model or self.config.default_model,
+            "temperature": (
+                self.config.default_temperature if temperature is None else temperature
+            ),
+            "fallback_model": fallback_model or self.config.llm_fallback_model or None,
+            "hedge": self.config.llm_hedge_enabled if hedge is None else hedge,
+        }
+        if settings == self.llm_settings:
+            return
+        self.llm = build_llm(stats=self.hedge_stats, config=self.config, **settings)
+        self.llm_settings = settings
+        for agent in self.agents.values():
+            agent.llm = self.llm
+
+    def get_llm_stats(self) -> Dict:
+        """Retorna as métricas de hedge das chamadas ao LLM"""
+        return self.hedge_stats.as_dict()
+
+    def get_tool_stats(self) -> Dict:
+        """Retorna chamadas e tempo de execução por ferramenta"""
+        return self.tool_registry.executor.summary()
 
     def create_agent(
         self, agent_type: str, tools: Optional[list] = None, **kwargs
@@ -68,28 +123,59 @@ class AgentManager:
             return None
 
         agent_config = self.available_agents[agent_type].copy()
+        explicit = bool(kwargs) or tools is not None
+        if not explicit:
+            # Sem personalização explícita, aplica as alterações salvas sobre
+            # a configuração do código
+            saved = self.agent_snapshots.get(agent_type, {})
+            kwargs = {k: v for k, v in saved.items() if k != "tools"}
+            tools = saved.get("tools")
         agent_config.update(kwargs)
 
         if tools is None:
             tools = self.agent_tools.get(agent_type, [])
 
         try:
+            options = {"llm": self.llm} if self.llm is not None else {}
             agent = Agent(
                 role=agent_config["role"],
                 goal=agent_config["goal"],
                 backstory=agent_config["backstory"],
-                tools=tools,
+                tools=self.tool_registry.resolve(tools),
                 verbose=True,
                 allow_delegation=False,
+                **options,
             )
 
             self.agents[agent_type] = agent
+            self.version += 1
+            if explicit:
+                self._save_snapshot(agent_type, agent_config, tools)
             return agent
 
         except Exception as e:
             print(f"Erro ao criar agente {agent_type}: {e}")
             return None
 
+    def _save_snapshot(self, agent_type: str, agent_config: Dict, tools: list) -> None:
+        """Grava as diferenças do agente em relação à configuração do código"""
+        if self.snapshot_store is None:
+            return
+        defaults = self.available_agents[agent_type]
+        snapshot = {
+            key: agent_config[key]
+            for key in ("role", "goal", "backstory")
+            if agent_config[key] != defaults.get(key)
+        }
+        names = [getattr(tool, "name", tool) for tool in tools]
+        if names != self.agent_tools.get(agent_type, []):
+            snapshot["tools"] = names
+        try:
+            self.snapshot_store.save("agent", agent_type, snapshot)
+            self.agent_snapshots[agent_type] = snapshot
+        except Exception as e:
+            print(f"Erro ao salvar snapshot do agente {agent_type}: {e}")
+
     def get_agent(self, agent_type: str) -> Optional[Agent]:
         """Retorna um agente existente"""
         return self.agents.get(agent_type)
@@ -108,4 +194,5 @@ class AgentManager:
 
     def get_agent_tools(self, agent_type: str) -> List[str]:
         """Retorna a lista de ferramentas disponíveis para o agente"""
-        return self.agent_tools.get(agent_type, [])
+        saved = self.agent_snapshots.get(agent_type, {})
+        return saved.get("tools", self.agent_tools.get(agent_type, []))
@@ -0,0 +1,213 @@
+"""
+Camada de LLM dos agentes, com requisições hedged para reduzir a latência de cauda
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class HedgeStats:
+    """Latências observadas e métricas de hedge, compartilhadas entre modelos"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.latencies: Dict[str, deque] = {}
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def hedge_delay(
+        self, model: str, percentile: float, min_samples: int, default: float
+    ) -> float:
+        """Tempo de espera antes do hedge: percentil da latência observada"""
+        with self._lock:
+            samples = sorted(self.latencies.get(model, []))
+        if len(samples) < min_samples:
+            return default
+        index = min(len(samples) - 1, math.ceil(len(samples) * percentile) - 1)
+        return samples[max(index, 0)]
+
+    def record(self, model: str, elapsed: float, hedged: bool, winner: str) -> None:
+        """Registra o resultado de uma chamada
+
+        Quando o hedge vence, ``elapsed`` é o momento em que o primário foi
+        cancelado e entra nas latências como limite inferior.
+        """
+        with self._lock:
+            samples = self.latencies.setdefault(model, deque(maxlen=self.window))
+            self.requests += 1
+            if hedged:
+                self.hedged += 1
+            if winner == "primary":
+                samples.append(elapsed)
+                return
+            self.hedge_wins += 1
+            # Estimativa: latência média do primário nas chamadas que passaram
+            # do tempo de hedge, menos o tempo que o hedge levou
+            slow = [latency for latency in samples if latency > elapsed]
+            if slow:
+                self.saved_seconds += sum(slow) / len(slow) - elapsed
+            # Amostra censurada: o primário foi cancelado em ``elapsed`` e levaria
+            # no mínimo isso. Sem ela a cauda some e o atraso do hedge encolhe.
+            samples.append(elapsed)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Métricas agregadas para o dashboard"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+def combine_hedge_stats(stats: List[Dict[str, float]]) -> Dict[str, float]:
+    """Soma as métricas de hedge de vários processos"""
+    total = {"requests": 0, "hedged": 0, "hedge_wins": 0, "saved_seconds": 0.0}
+    for entry in stats:
+        for key in total:
+            total[key] += entry.get(key, 0)
+    total["hedge_rate"] = (
+        total["hedged"] / total["requests"] if total["requests"] else 0.0
+    )
+    return total
+
+
+class HedgedChatModel(BaseChatModel):
+    """Modelo de chat que dispara uma requisição duplicada quando a original demora
+
+    Se o modelo primário não responder até o percentil configurado da latência
+    observada, a mesma requisição é enviada ao modelo de hedge (o mesmo modelo
+    ou um fallback). A primeira resposta bem-sucedida vence e a outra é cancelada.
+    """
+
+    primary: BaseChatModel
+    hedge: BaseChatModel
+    stats: HedgeStats
+    model_name: str = ""
+    hedge_percentile: float = 0.95
+    min_samples: int = 20
+    initial_delay: float = 10.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "primary": getattr(self.primary, "model_name", None),
+            "hedge": getattr(self.hedge, "model_name", None),
+            "hedge_percentile": self.hedge_percentile,
+        }
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        coroutine = self._race(messages, stop, **kwargs)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # Já existe um event loop nesta thread: executa a corrida em outra
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await self._race(messages, stop, **kwargs)
+
+    async def _race(
+        self, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any
+    ) -> ChatResult:
+        """Executa o primário e, se demorar, o hedge; retorna o primeiro sucesso"""
+        start = time.perf_counter()
+        delay = self.stats.hedge_delay(
+            self.model_name, self.hedge_percentile, self.min_samples, self.initial_delay
+        )
+        primary = asyncio.ensure_future(
+            self.primary.ainvoke(messages, stop=stop, **kwargs)
+        )
+        names = {primary: "primary"}
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        hedged = not done
+        if hedged:
+            hedge = asyncio.ensure_future(
+                self.hedge.ainvoke(messages, stop=stop, **kwargs)
+            )
+            names[hedge] = "hedge"
+
+        pending = set(names)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                # Cancela a requisição perdedora
+                for loser in pending:
+                    loser.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                self.stats.record(
+                    self.model_name, time.perf_counter() - start, hedged, names[task]
+                )
+                return ChatResult(generations=[ChatGeneration(message=task.result())])
+        raise error
+
+
+def build_llm(
+    model: str,
+    temperature: float = 0.7,
+    fallback_model: Optional[str] = None,
+    hedge: bool = False,
+    stats: Optional[HedgeStats] = None,
+    config=None,
+) -> BaseChatModel:
+    """Cria o LLM dos agentes, com hedge opcional para o modelo de fallback"""
+    from langchain_openai import ChatOpenAI
+
+    primary = ChatOpenAI(model=model, temperature=temperature)
+    if not hedge:
+        return primary
+    options = {}
+    if config is not None:
+        options = {
+            "hedge_percentile": config.llm_hedge_percentile,
+            "min_samples": config.llm_hedge_min_samples,
+            "initial_delay": config.llm_hedge_initial_delay,
+        }
+    return HedgedChatModel(
+        primary=primary,
+        hedge=ChatOpenAI(model=fallback_model or model, temperature=temperature),
+        stats=stats or HedgeStats(),
+        model_name=model,
+        **options,
+    )
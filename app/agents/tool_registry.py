@@ -0,0 +1,479 @@
+"""
+Registro de ferramentas dos agentes e camada compartilhada de execução
+"""
+
+import hashlib
+import json
+import os
+import re
+import statistics
+import threading
+import time
+from abc import abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Type
+
+from langchain_core.pydantic_v1 import BaseModel, Field
+from langchain_core.tools import BaseTool
+
+
+class ToolExecutor:
+    """Executa ferramentas com cache por hash dos argumentos, timeout e lotes
+
+    Chamadas idênticas de ferramentas determinísticas reaproveitam o cache global.
+    Dentro de um kickoff (``kickoff_scope``), chamadas repetidas de qualquer
+    ferramenta sem efeitos colaterais compartilham o mesmo resultado, inclusive
+    quando ainda estão em execução.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = 256,
+        default_timeout: float = 60.0,
+        max_workers: int = 4,
+    ):
+        self.cache_size = cache_size
+        self.default_timeout = default_timeout
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        # Chamadas que passaram do tempo limite e seguem ocupando uma thread
+        self._stuck: set = set()
+        self.replaced_pools = 0
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._batch: Optional[Dict[str, Future]] = None
+        self._scopes = 0
+        self._lock = threading.Lock()
+        self.calls: deque = deque(maxlen=500)
+
+    @classmethod
+    def from_config(cls, config) -> "ToolExecutor":
+        """Cria o executor a partir da configuração do sistema"""
+        return cls(
+            cache_size=config.tool_cache_size, default_timeout=config.tool_timeout
+        )
+
+    @contextmanager
+    def kickoff_scope(self) -> Iterator[None]:
+        """Agrupa as chamadas repetidas feitas durante um kickoff"""
+        with self._lock:
+            if self._scopes == 0:
+                self._batch = {}
+            self._scopes += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._scopes -= 1
+                if self._scopes == 0:
+                    self._batch = None
+
+    @staticmethod
+    def cache_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Hash estável do nome da ferramenta e dos argumentos"""
+        payload = json.dumps(arguments, sort_keys=True, default=str)
+        return hashlib.sha256(f"{tool_name}:{payload}".encode("utf-8")).hexdigest()
+
+    def run(
+        self,
+        tool: "RegisteredTool",
+        arguments: Dict[str, Any],
+        function: Callable[[], Any],
+    ) -> Any:
+        """Executa a ferramenta aplicando cache, lote e timeout"""
+        start = time.perf_counter()
+        key = self.cache_key(tool.name, {**arguments, **tool.cache_extra(arguments)})
+        timeout = tool.timeout or self.default_timeout
+
+        with self._lock:
+            if tool.cacheable and key in self._cache:
+                self._cache.move_to_end(key)
+                result = self._cache[key]
+                source = "cache"
+                future = None
+            elif tool.batchable and self._batch is not None and key in self._batch:
+                future = self._batch[key]
+                source = "lote"
+            else:
+                future = self._pool.submit(function)
+                source = "execução"
+                if tool.batchable and self._batch is not None:
+                    self._batch[key] = future
+
+        status = "ok"
+        if future is not None:
+            try:
+                result = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                if not future.cancel():
+                    self._abandon(future)
+                status = "timeout"
+                result = (
+                    f"Erro: a ferramenta {tool.name} excedeu o tempo limite "
+                    f"de {timeout:.0f}s"
+                )
+                self._forget(key, future)
+            except Exception as e:
+                status = "erro"
+                result = f"Erro ao executar {tool.name}: {e}"
+                self._forget(key, future)
+            else:
+                if tool.cacheable:
+                    self._store(key, result)
+
+        self._report(tool.name, key, source, status, time.perf_counter() - start)
+        return result
+
+    def _abandon(self, future: Future) -> None:
+        """Troca o pool quando uma chamada travada continua ocupando uma thread
+
+        A thread não pode ser interrompida; sem a troca, algumas chamadas
+        travadas (ex.: web_search, pdf_reader) ocupariam todo o pool e as
+        chamadas seguintes só dariam timeout. O pool antigo termina sozinho.
+        """
+        with self._lock:
+            if future in self._stuck or future.done():
+                return
+            self._stuck.add(future)
+            future.add_done_callback(self._stuck.discard)
+            old_pool = self._pool
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            self.replaced_pools += 1
+        old_pool.shutdown(wait=False)
+        print(
+            f"[tool] pool de execução substituído "
+            f"({len(self._stuck)} chamada(s) travada(s))"
+        )
+
+    def _store(self, key: str, result: Any) -> None:
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, key: str, future: Future) -> None:
+        """Remove do lote uma chamada que falhou, para permitir nova tentativa"""
+        with self._lock:
+            if self._batch is not None and self._batch.get(key) is future:
+                del self._batch[key]
+
+    def _report(
+        self, tool_name: str, key: str, source: str, status: str, elapsed: float
+    ) -> None:
+        """Registra e exibe o tempo de execução de uma chamada"""
+        call = {
+            "tool": tool_name,
+            "args_hash": key[:12],
+            "source": source,
+            "status": status,
+            "runtime_ms": elapsed * 1000,
+        }
+        self.calls.append(call)
+        print(
+            f"[tool] {tool_name} {call['runtime_ms']:.1f} ms "
+            f"({source}, {status}, args={call['args_hash']})"
+        )
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Chamadas, tempo médio e reaproveitamento por ferramenta"""
+        totals: Dict[str, Dict[str, float]] = {}
+        for call in list(self.calls):
+            entry = totals.setdefault(
+                call["tool"], {"calls": 0, "reused": 0, "total_ms": 0.0}
+            )
+            entry["calls"] += 1
+            entry["total_ms"] += call["runtime_ms"]
+            if call["source"] != "execução":
+                entry["reused"] += 1
+        for entry in totals.values():
+            entry["avg_ms"] = entry["total_ms"] / entry["calls"]
+        return totals
+
+
+def combine_tool_stats(stats: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict]:
+    """Soma as métricas de ferramentas de vários processos"""
+    totals: Dict[str, Dict[str, float]] = {}
+    for entry in stats:
+        for tool_name, values in entry.items():
+            total = totals.setdefault(
+                tool_name, {"calls": 0, "reused": 0, "total_ms": 0.0}
+            )
+            for key in total:
+                total[key] += values.get(key, 0)
+    for total in totals.values():
+        total["avg_ms"] = total["total_ms"] / total["calls"] if total["calls"] else 0.0
+    return totals
+
+
+class RegisteredTool(BaseTool):
+    """Ferramenta cuja execução passa pelo ToolExecutor compartilhado"""
+
+    executor: ToolExecutor
+    timeout: Optional[float] = None
+    # Resultado depende apenas dos argumentos (pode ir para o cache global)
+    cacheable: bool = True
+    # Sem efeitos colaterais (chamadas repetidas no kickoff podem ser agrupadas)
+    batchable: bool = True
+
+    def _run(self, **kwargs: Any) -> Any:
+        return self.executor.run(self, kwargs, lambda: self.execute(**kwargs))
+
+    @abstractmethod
+    def execute(self, **kwargs: Any) -> Any:
+        """Executa a ferramenta de fato (chamado pelo ToolExecutor)"""
+
+    def cache_extra(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Dados extras da chave de cache (ex.: data de modificação de arquivos)"""
+        return {}
+
+
+def _file_version(path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class ReadExcelInput(BaseModel):
+    file_path: str = Field(description="Caminho do arquivo .xlsx")
+    column_name: str = Field(description="Nome da coluna a ser lida")
+
+
+class ReadExcelTool(RegisteredTool):
+    name: str = "read_excel"
+    description: str = "Lê os valores de uma coluna de um arquivo Excel"
+    args_schema: Type[BaseModel] = ReadExcelInput
+
+    def execute(self, file_path: str, column_name: str) -> List[str]:
+        from app.utils.tools import read_excel_column
+
+        return read_excel_column(file_path, column_name)
+
+    def cache_extra(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {"mtime": _file_version(arguments.get("file_path", ""))}
+
+
+class CompareTextInput(BaseModel):
+    list1: List[str] = Field(description="Textos a serem procurados")
+    list2: List[str] = Field(description="Textos candidatos para comparação")
+
+
+class CompareTextTool(RegisteredTool):
+    name: str = "compare_text"
+    description: str = (
+        "Encontra, para cada texto de list1, o mais similar em list2 "
+        "e retorna a pontuação de similaridade"
+    )
+    args_schema: Type[BaseModel] = CompareTextInput
+
+    def execute(self, list1: List[str], list2: List[str]) -> Dict:
+        from app.utils.tools import compare_text_similarity
+
+        return compare_text_similarity(list1, list2)
+
+
+class PdfReaderInput(BaseModel):
+    file_path: str = Field(description="Caminho do arquivo PDF")
+    max_pages: int = Field(default=20, description="Número máximo de páginas")
+
+
+class PdfReaderTool(RegisteredTool):
+    name: str = "pdf_reader"
+    description: str = "Extrai o texto das páginas de um arquivo PDF"
+    args_schema: Type[BaseModel] = PdfReaderInput
+
+    def execute(self, file_path: str, max_pages: int = 20) -> str:
+        from pypdf import PdfReader
+
+        reader = PdfReader(file_path)
+        pages = reader.pages[:max_pages]
+        return "\n\n".join(page.extract_text() or "" for page in pages)
+
+    def cache_extra(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {"mtime": _file_version(arguments.get("file_path", ""))}
+
+
+class WebSearchInput(BaseModel):
+    query: str = Field(description="Termos da pesquisa")
+    max_results: int = Field(default=5, description="Número máximo de resultados")
+
+
+class WebSearchTool(RegisteredTool):
+    name: str = "web_search"
+    description: str = "Pesquisa na web (DuckDuckGo) e retorna títulos, links e trechos"
+    args_schema: Type[BaseModel] = WebSearchInput
+    cacheable: bool = False
+    timeout: Optional[float] = 20.0
+
+    def execute(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+        from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+
+        return DuckDuckGoSearchAPIWrapper().results(query, max_results)
+
+
+class StatisticalAnalysisInput(BaseModel):
+    values: List[float] = Field(description="Valores numéricos a analisar")
+
+
+class StatisticalAnalysisTool(RegisteredTool):
+    name: str = "statistical_analysis"
+    description: str = (
+        "Calcula estatísticas descritivas (média, mediana, desvio padrão, "
+        "mínimo, máximo e quartis) de uma lista de valores"
+    )
+    args_schema: Type[BaseModel] = StatisticalAnalysisInput
+
+    def execute(self, values: List[float]) -> Dict[str, float]:
+        if not values:
+            raise ValueError("Nenhum valor informado")
+        result = {
+            "count": len(values),
+            "mean": statistics.fmean(values),
+            "median": statistics.median(values),
+            "min": min(values),
+            "max": max(values),
+            "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        }
+        if len(values) > 1:
+            q1, _, q3 = statistics.quantiles(values, n=4)
+            result.update({"q1": q1, "q3": q3})
+        return result
+
+
+class TextFormatterInput(BaseModel):
+    text: str = Field(description="Texto a ser formatado")
+    style: str = Field(
+        default="paragraphs",
+        description="Formato: 'paragraphs', 'bullets' ou 'title'",
+    )
+
+
+class TextFormatterTool(RegisteredTool):
+    name: str = "text_formatter"
+    description: str = (
+        "Normaliza espaços e formata o texto em parágrafos, lista de tópicos "
+        "ou título"
+    )
+    args_schema: Type[BaseModel] = TextFormatterInput
+
+    def execute(self, text: str, style: str = "paragraphs") -> str:
+        paragraphs = [
+            re.sub(r"\s+", " ", block).strip()
+            for block in re.split(r"\n\s*\n", text)
+            if block.strip()
+        ]
+        if style == "bullets":
+            return "\n".join(f"- {paragraph}" for paragraph in paragraphs)
+        if style == "title":
+            return " ".join(paragraphs).title()
+        return "\n\n".join(paragraphs)
+
+
+class NormCheckerInput(BaseModel):
+    text: str = Field(description="Texto a ser verificado")
+    required_terms: List[str] = Field(
+        default_factory=list, description="Termos ou seções obrigatórias"
+    )
+    max_words: Optional[int] = Field(
+        default=None, description="Limite máximo de palavras"
+    )
+
+
+class NormCheckerTool(RegisteredTool):
+    name: str = "norm_checker"
+    description: str = (
+        "Verifica se o texto contém os termos obrigatórios e respeita o limite "
+        "de palavras, listando as não conformidades"
+    )
+    args_schema: Type[BaseModel] = NormCheckerInput
+
+    def execute(
+        self,
+        text: str,
+        required_terms: Optional[List[str]] = None,
+        max_words: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        lowered = text.lower()
+        missing = [term for term in required_terms or [] if term.lower() not in lowered]
+        words = len(text.split())
+        issues = [f"Termo obrigatório ausente: {term}" for term in missing]
+        if max_words is not None and words > max_words:
+            issues.append(f"Texto com {words} palavras (limite: {max_words})")
+        return {"conforme": not issues, "palavras": words, "problemas": issues}
+
+
+class CommunicationHubInput(BaseModel):
+    action: str = Field(description="'post' para publicar ou 'read' para ler")
+    channel: str = Field(default="geral", description="Canal de comunicação")
+    message: str = Field(default="", description="Mensagem a publicar")
+
+
+class CommunicationHubTool(RegisteredTool):
+    name: str = "communication_hub"
+    description: str = (
+        "Quadro de mensagens compartilhado entre os agentes: publica ou lê "
+        "mensagens de um canal"
+    )
+    args_schema: Type[BaseModel] = CommunicationHubInput
+    cacheable: bool = False
+    batchable: bool = False
+    channels: Dict[str, List[str]] = Field(default_factory=dict)
+
+    def execute(self, action: str, channel: str = "geral", message: str = "") -> Any:
+        messages = self.channels.setdefault(channel, [])
+        if action == "post":
+            messages.append(message)
+            return f"Mensagem publicada em '{channel}'"
+        return messages[-20:]
+
+
+class ToolRegistry:
+    """Mapeia os nomes de ferramentas dos agentes para implementações reais"""
+
+    def __init__(self, executor: Optional[ToolExecutor] = None):
+        self.executor = executor or ToolExecutor()
+        self.tool_classes: Dict[str, Type[RegisteredTool]] = {
+            "read_excel": ReadExcelTool,
+            "compare_text": CompareTextTool,
+            "pdf_reader": PdfReaderTool,
+            "web_search": WebSearchTool,
+            "statistical_analysis": StatisticalAnalysisTool,
+            "text_formatter": TextFormatterTool,
+            "norm_checker": NormCheckerTool,
+            "communication_hub": CommunicationHubTool,
+        }
+        self._instances: Dict[str, RegisteredTool] = {}
+
+    def register(self, name: str, tool_class: Type[RegisteredTool]) -> None:
+        """Registra (ou substitui) a implementação de uma ferramenta"""
+        self.tool_classes[name] = tool_class
+        self._instances.pop(name, None)
+
+    def get(self, name: str) -> Optional[RegisteredTool]:
+        """Retorna a instância compartilhada da ferramenta"""
+        if name not in self.tool_classes:
+            return None
+        if name not in self._instances:
+            self._instances[name] = self.tool_classes[name](executor=self.executor)
+        return self._instances[name]
+
+    def resolve(self, names: List[Any]) -> List[BaseTool]:
+        """Converte nomes em ferramentas; objetos já instanciados são mantidos"""
+        tools = []
+        for name in names:
+            if not isinstance(name, str):
+                tools.append(name)
+                continue
+            tool = self.get(name)
+            if tool is None:
+                print(f"Ferramenta {name} não registrada")
+                continue
+            tools.append(tool)
+        return tools
+
+    def list_tools(self) -> List[str]:
+        """Lista os nomes das ferramentas registradas"""
+        return list(self.tool_classes.keys())
@@ -0,0 +1,169 @@
+"""
+Orçamento de contexto entre etapas de workflow
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+Summarizer = Callable[[str, int], str]
+
+_encodings: Dict[str, object] = {}
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Conta tokens para o modelo (estimativa de 4 caracteres/token sem tiktoken)"""
+    if model not in _encodings:
+        try:
+            import tiktoken
+
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except Exception:
+            _encodings[model] = None
+    encoding = _encodings[model]
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def prune_files(directory: Path, keep: int) -> int:
+    """Remove os arquivos .txt mais antigos do diretório, mantendo ``keep``"""
+    try:
+        files = sorted(directory.glob("*.txt"), key=lambda path: path.stat().st_mtime)
+    except OSError:
+        return 0
+    removed = 0
+    for path in files[: max(len(files) - keep, 0)]:
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def looks_tabular(text: str) -> bool:
+    """Indica se a saída parece uma tabela ou estrutura JSON"""
+    stripped = text.strip()
+    if stripped[:1] in ("{", "["):
+        try:
+            json.loads(stripped)
+            return True
+        except ValueError:
+            pass
+    lines = [line for line in stripped.splitlines() if line.strip()]
+    if len(lines) < 5:
+        return False
+    delimited = sum(1 for line in lines if re.search(r"[|;\t]", line))
+    return delimited / len(lines) >= 0.6
+
+
+def build_summarizer(model: str) -> Summarizer:
+    """Cria um resumidor que usa o próprio modelo da OpenAI"""
+    import openai
+
+    client = openai.OpenAI()
+
+    def summarize(text: str, max_tokens: int) -> str:
+        response = client.chat.completions.create(
+            model=model,
+            max_tokens=max_tokens,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Resuma o texto preservando números, nomes e "
+                    "conclusões relevantes para a próxima etapa.",
+                },
+                {"role": "user", "content": text},
+            ],
+        )
+        return response.choices[0].message.content or ""
+
+    return summarize
+
+
+class ContextBudgeter:
+    """Compacta saídas de etapas anteriores para caber no orçamento de tokens"""
+
+    def __init__(
+        self,
+        max_tokens: int = 2000,
+        results_dir: Optional[str] = None,
+        summarizer: Optional[Summarizer] = None,
+        preview_lines: int = 5,
+        max_files: int = 200,
+    ):
+        self.max_tokens = max_tokens
+        self.results_dir = Path(results_dir) if results_dir else None
+        self.summarizer = summarizer
+        self.preview_lines = preview_lines
+        self.max_files = max_files
+
+    def truncate(self, text: str, max_tokens: int, model: str) -> str:
+        """Mantém o início e o fim do texto dentro do limite de tokens"""
+        if count_tokens(text, model) <= max_tokens:
+            return text
+        marker = "\n[...]\n"
+        # Busca binária pelo maior corte proporcional que cabe no limite
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            head, tail = text[: mid * 2 // 3], text[len(text) - mid // 3 :]
+            if count_tokens(head + marker + tail, model) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        return text[: low * 2 // 3] + marker + text[len(text) - low // 3 :]
+
+    def save_reference(self, text: str, name: str, model: str) -> str:
+        """Grava a saída completa em arquivo e retorna uma referência resumida"""
+        # O hash do conteúdo evita que execuções diferentes sobrescrevam o arquivo
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        filename = re.sub(r"[^\w-]+", "_", name)
+        path = self.results_dir / f"{filename}_{digest}.txt"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        prune_files(self.results_dir, self.max_files)
+        lines = text.strip().splitlines()
+        preview = "\n".join(lines[: self.preview_lines])
+        return (
+            f"Resultado completo em {path} "
+            f"({len(lines)} linhas, {len(text)} caracteres, "
+            f"{count_tokens(text, model)} tokens). Prévia:\n{preview}"
+        )
+
+    def compact(self, text: str, max_tokens: int, model: str, name: str) -> str:
+        """Reduz uma saída ao limite: referência para tabelas, resumo ou corte"""
+        if count_tokens(text, model) <= max_tokens:
+            return text
+        if self.results_dir and looks_tabular(text):
+            return self.truncate(
+                self.save_reference(text, name, model), max_tokens, model
+            )
+        if self.summarizer:
+            return self.truncate(self.summarizer(text, max_tokens), max_tokens, model)
+        return self.truncate(text, max_tokens, model)
+
+    def build_context(
+        self, steps: List[str], outputs: List[Optional[str]], model: str, prefix: str
+    ) -> Tuple[str, int]:
+        """Monta o contexto das etapas anteriores dentro do orçamento"""
+        entries = [(s, o) for s, o in zip(steps, outputs) if o]
+        if not entries:
+            return "", 0
+        remaining = self.max_tokens
+        parts: List[str] = []
+        # Compacta das etapas mais recentes para as antigas; a sobra passa adiante
+        for position, (step, output) in enumerate(reversed(entries)):
+            header = f"### {step}\n"
+            remaining -= count_tokens(header, model)
+            share = max(remaining // (len(entries) - position), 0)
+            compacted = self.compact(
+                output, share, model, f"{prefix}_{len(entries) - position}_{step}"
+            )
+            remaining -= count_tokens(compacted, model)
+            parts.append(header + compacted)
+        context = "\n\n".join(reversed(parts))
+        return context, count_tokens(context, model)
@@ -2,17 +2,60 @@
 Gerenciador de crews para o sistema
 """
 
+import hashlib
+import re
+from collections import deque
+from datetime import datetime
+from pathlib import Path
 from crewai import Crew, Task
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from app.agents.agent_manager import AgentManager
+from app.crews.context import (
+    ContextBudgeter,
+    build_summarizer,
+    count_tokens,
+    prune_files,
+)
+from app.crews.memory import MemoryStore
+from app.crews.snapshot import SnapshotStore
+from app.utils.admission import AdmissionController, AdmissionRejected
+from app.utils.config import Config
+from app.utils.job_queue import JobQueue
 
 
 class CrewManager:
     """Classe para gerenciar crews do sistema"""
 
-    def __init__(self, agent_manager: AgentManager):
+    def __init__(
+        self,
+        agent_manager: AgentManager,
+        memory_store: Optional[MemoryStore] = None,
+        config: Optional[Config] = None,
+        job_queue: Optional[JobQueue] = None,
+        snapshot_store: Optional[SnapshotStore] = None,
+    ):
         self.agent_manager = agent_manager
+        self.config = config or Config()
+        self.snapshot_store = snapshot_store or SnapshotStore.from_config(self.config)
+        self.memory_store = memory_store or MemoryStore.from_config(self.config)
+        self.job_queue = job_queue or JobQueue.from_config(self.config)
+        self.admission = AdmissionController.from_config(self.job_queue, self.config)
+        self.context_budgeter = ContextBudgeter(
+            max_tokens=self.config.context_max_tokens,
+            results_dir=self.config.results_dir,
+            max_files=self.config.results_max_files,
+            summarizer=(
+                build_summarizer(self.config.default_model)
+                if self.config.context_summarize
+                else None
+            ),
+        )
+        # Uso de tokens por etapa, para rastrear prompts muito grandes
+        self.token_usage: deque = deque(maxlen=200)
+        # Crews do CrewAI já materializadas (criadas na primeira execução)
         self.crews: Dict[str, Crew] = {}
+        # Incrementada a cada alteração das crews (usada pelos view models da UI)
+        self.version = 0
         self.crew_configs: Dict[str, Dict] = {}
         self.crew_templates: Dict[str, Dict] = {
             "Projeto Padr\u00e3o": {
@@ -34,6 +77,26 @@ class CrewManager:
                 "Gerar relat\u00f3rio",
             ]
         }
+        self._restore_snapshots()
+
+    def _restore_snapshots(self) -> None:
+        """Restaura as configurações salvas; as crews são materializadas depois"""
+        try:
+            if self.agent_manager.snapshot_store is None:
+                self.agent_manager.use_snapshot_store(self.snapshot_store)
+            self.crew_configs.update(self.snapshot_store.load_latest("crew"))
+        except Exception as e:
+            print(f"Erro ao restaurar snapshots: {e}")
+            return
+
+        # Compactação depois da restauração: uma falha (ex.: banco travado por
+        # outro processo) não deixa a sessão sem crews
+        try:
+            stale = self.snapshot_store.stale_count()
+            if stale > self.config.snapshot_compact_threshold:
+                self.compact_snapshots()
+        except Exception as e:
+            print(f"Erro ao compactar snapshots: {e}")
 
     def create_crew(
         self,
@@ -41,15 +104,37 @@ class CrewManager:
         agent_types: List[str],
         description: str = "",
         workflow: str | None = None,
+        created_at: Optional[str] = None,
     ) -> Optional[Crew]:
         """Cria uma nova crew com os agentes especificados"""
+        if workflow and workflow not in self.workflows:
+            print(f"Workflow {workflow} não encontrado")
+            workflow = None
+        crew_config = {
+            "description": description,
+            "agent_types": agent_types,
+            "created_at": created_at or datetime.now().isoformat(timespec="seconds"),
+            "workflow": workflow,
+        }
+        crew = self._materialize(name, crew_config)
+        if not crew:
+            return None
+
+        self.crews[name] = crew
+        self.crew_configs[name] = crew_config
+        self.version += 1
+        try:
+            self.snapshot_store.save("crew", name, crew_config)
+        except Exception as e:
+            print(f"Erro ao salvar snapshot da crew {name}: {e}")
+        return crew
+
+    def _materialize(self, name: str, crew_config: Dict) -> Optional[Crew]:
+        """Cria os agentes e a Crew do CrewAI a partir da configuração"""
         try:
-            if workflow and workflow not in self.workflows:
-                print(f"Workflow {workflow} não encontrado")
-                workflow = None
             # Criar agentes se não existirem
             agents = []
-            for agent_type in agent_types:
+            for agent_type in crew_config["agent_types"]:
                 agent = self.agent_manager.get_agent(agent_type)
                 if not agent:
                     agent = self.agent_manager.create_agent(agent_type)
@@ -65,22 +150,14 @@ class CrewManager:
                 print("Nenhum agente válido foi criado")
                 return None
 
-            # Criar crew
+            # Criar crew; a memória usa o MemoryStore local em vez do padrão
             crew = Crew(
                 agents=agents,
                 tasks=[],  # Tarefas serão adicionadas posteriormente
                 verbose=True,
-                memory=True,
+                memory=False,
             )
-
-            self.crews[name] = crew
-            self.crew_configs[name] = {
-                "description": description,
-                "agent_types": agent_types,
-                "created_at": "2024-01-01",  # Em produção, usar datetime.now()
-                "workflow": workflow,
-            }
-
+            self.memory_store.attach(crew, name)
             return crew
 
         except Exception as e:
@@ -88,51 +165,156 @@ class CrewManager:
             return None
 
     def get_crew(self, name: str) -> Optional[Crew]:
-        """Retorna uma crew existente"""
-        return self.crews.get(name)
+        """Retorna uma crew, materializando-a no primeiro uso se foi restaurada"""
+        crew = self.crews.get(name)
+        if crew is None and name in self.crew_configs:
+            crew = self._materialize(name, self.crew_configs[name])
+            if crew:
+                self.crews[name] = crew
+        return crew
 
     def get_all_crews(self) -> Dict[str, Crew]:
-        """Retorna todas as crews criadas"""
+        """Retorna as crews já materializadas"""
         return self.crews
 
     def get_crew_info(self, name: str) -> Optional[Dict]:
         """Retorna informações sobre uma crew"""
         return self.crew_configs.get(name)
 
-    def execute_crew_task(self, crew_name: str, task_description: str) -> Optional[str]:
+    def get_crew_history(self, name: str) -> List[Dict]:
+        """Retorna as versões salvas da configuração de uma crew"""
+        return self.snapshot_store.history("crew", name)
+
+    def restore_crew_version(self, name: str, version: int) -> bool:
+        """Volta a crew para uma versão salva da configuração"""
+        crew_config = self.snapshot_store.restore("crew", name, version)
+        if crew_config is None:
+            return False
+        self.crew_configs[name] = crew_config
+        # A crew do CrewAI é recriada com a nova configuração no próximo uso
+        self.crews.pop(name, None)
+        self.version += 1
+        return True
+
+    def compact_snapshots(self) -> int:
+        """Remove dos snapshots as crews excluídas e as versões antigas"""
+        removed = self.snapshot_store.compact()
+        if removed:
+            print(f"[snapshots] {removed} registros removidos na compactação")
+        return removed
+
+    def execute_crew_task(
+        self,
+        crew_name: str,
+        task_description: str,
+        context: str = "",
+        model: Optional[str] = None,
+    ) -> Optional[str]:
         """Executa uma tarefa usando uma crew específica"""
         crew = self.get_crew(crew_name)
         if not crew:
             print(f"Crew {crew_name} não encontrada")
             return None
 
+        prompt = task_description
+        if context:
+            prompt = f"{task_description}\n\nContexto das etapas anteriores:\n{context}"
+
         try:
             # Criar tarefa
             task = Task(
-                description=task_description,
+                description=prompt,
                 expected_output="Resultado da execução da tarefa",
                 agent=crew.agents[0] if crew.agents else None,
             )
+            crew.tasks = [task]
 
-            # Executar crew
-            result = crew.kickoff()
-            return str(result)
+            # Executar crew; chamadas repetidas de ferramentas são agrupadas
+            with self.agent_manager.tool_registry.executor.kickoff_scope():
+                result = crew.kickoff()
+            self.memory_store.flush()
+            output = str(result)
+            self._record_token_usage(
+                crew_name, task_description, prompt, context, output, model
+            )
+            return output
 
         except Exception as e:
             print(f"Erro ao executar tarefa na crew {crew_name}: {e}")
             return None
 
+    def _record_token_usage(
+        self,
+        crew_name: str,
+        step: str,
+        prompt: str,
+        context: str,
+        output: str,
+        model: Optional[str] = None,
+    ) -> Dict:
+        """Registra e exibe o uso de tokens de uma etapa"""
+        model = model or self.config.default_model
+        usage = {
+            "crew": crew_name,
+            "step": step,
+            "model": model,
+            "prompt_tokens": count_tokens(prompt, model),
+            "context_tokens": count_tokens(context, model),
+            "output_tokens": count_tokens(output, model),
+            "prompt": prompt,
+            "prompt_file": self._save_prompt(crew_name, step, prompt),
+        }
+        self.token_usage.append(usage)
+        print(
+            f"[tokens] {crew_name} / {step} ({model}): "
+            f"prompt={usage['prompt_tokens']} "
+            f"(contexto={usage['context_tokens']}) "
+            f"saída={usage['output_tokens']} "
+            f"arquivo={usage['prompt_file']}"
+        )
+        return usage
+
+    def _save_prompt(self, crew_name: str, step: str, prompt: str) -> Optional[str]:
+        """Grava o prompt em RESULTS_DIR/prompts para rastrear etapas grandes"""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        filename = re.sub(r"[^\w-]+", "_", f"{crew_name}_{step[:40]}")
+        path = Path(self.config.results_dir) / "prompts" / f"{filename}_{digest}.txt"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(prompt, encoding="utf-8")
+        except OSError as e:
+            print(f"Erro ao gravar prompt de {crew_name}: {e}")
+            return None
+        prune_files(path.parent, self.config.results_max_files)
+        return str(path)
+
+    def _job_token_usage(self, crew_name: str, steps: int) -> List[Dict]:
+        """Uso de tokens das últimas etapas, com o arquivo do prompt no lugar dele"""
+        usage = self.get_token_usage(crew_name)[-steps:] if steps else []
+        return [{k: v for k, v in entry.items() if k != "prompt"} for entry in usage]
+
+    def get_token_usage(self, crew_name: Optional[str] = None) -> List[Dict]:
+        """Retorna o uso de tokens registrado (todas as crews ou uma)"""
+        return [u for u in self.token_usage if crew_name in (None, u["crew"])]
+
     def delete_crew(self, name: str) -> bool:
         """Remove uma crew"""
-        if name in self.crews:
-            del self.crews[name]
+        if name in self.crew_configs:
+            self.crews.pop(name, None)
             del self.crew_configs[name]
+            self.memory_store.delete_crew(name)
+            self.snapshot_store.delete("crew", name)
+            self.version += 1
             return True
         return False
 
     def list_crew_names(self) -> List[str]:
         """Lista todos os nomes de crews"""
-        return list(self.crews.keys())
+        return list(self.crew_configs.keys())
+
+    def get_memory_stats(self) -> Dict:
+        """Retorna métricas do armazenamento de memória das crews"""
+        return self.memory_store.get_stats()
 
     def list_templates(self) -> List[str]:
         """Retorna os nomes dos templates disponíveis"""
@@ -142,7 +324,12 @@ class CrewManager:
         """Obtém um template de crew"""
         return self.crew_templates.get(name)
 
-    def execute_workflow(self, crew_name: str) -> List[str]:
+    def execute_workflow(
+        self,
+        crew_name: str,
+        model: Optional[str] = None,
+        on_step: Optional[Callable[[int, str, Optional[str]], None]] = None,
+    ) -> List[str]:
         """Executa o workflow associado a uma crew e retorna saídas"""
         crew_info = self.get_crew_info(crew_name)
         if not crew_info:
@@ -151,9 +338,182 @@ class CrewManager:
         if not workflow_name:
             return []
 
+        model = model or self.config.default_model
         steps = self.workflows.get(workflow_name, [])
         outputs = []
-        for step in steps:
-            result = self.execute_crew_task(crew_name, step)
+        for i, step in enumerate(steps):
+            # Saídas anteriores entram compactadas dentro do orçamento de tokens
+            context, _ = self.context_budgeter.build_context(
+                steps[:i], outputs, model, prefix=f"{crew_name}_{workflow_name}"
+            )
+            result = self.execute_crew_task(crew_name, step, context, model)
             outputs.append(result)
+            if on_step:
+                on_step(i, step, result)
         return outputs
+
+    def submit_crew_task(
+        self,
+        crew_name: str,
+        task_description: str,
+        model: Optional[str] = None,
+        llm_settings: Optional[Dict] = None,
+        user_id: str = "default",
+    ) -> Optional[str]:
+        """Enfileira uma tarefa para os workers e retorna o id do job
+
+        Lança AdmissionRejected se a fila estiver cheia.
+        """
+        crew_info = self.get_crew_info(crew_name)
+        if not crew_info:
+            print(f"Crew {crew_name} não encontrada")
+            return None
+        payload = {
+            "crew_config": crew_info,
+            "task": task_description,
+            "model": model,
+            "llm_settings": llm_settings or {},
+        }
+        return self.admission.submit("task", payload, crew=crew_name, user_id=user_id)
+
+    def submit_workflow(
+        self,
+        crew_name: str,
+        model: Optional[str] = None,
+        llm_settings: Optional[Dict] = None,
+        user_id: str = "default",
+    ) -> Optional[str]:
+        """Enfileira o workflow da crew para os workers e retorna o id do job
+
+        O custo no fair queueing é o número de etapas do workflow.
+        """
+        crew_info = self.get_crew_info(crew_name)
+        if not crew_info or not crew_info.get("workflow"):
+            print(f"Crew {crew_name} sem workflow")
+            return None
+        payload = {
+            "crew_config": crew_info,
+            "model": model,
+            "llm_settings": llm_settings or {},
+        }
+        steps = self.workflows.get(crew_info["workflow"], [])
+        return self.admission.submit(
+            "workflow",
+            payload,
+            crew=crew_name,
+            user_id=user_id,
+            cost=max(len(steps), 1),
+        )
+
+    def submit_planilhas(
+        self,
+        crew_name: str,
+        file1: str,
+        column1: str,
+        file2: str,
+        column2: str,
+        user_id: str = "default",
+    ) -> str:
+        """Enfileira a comparação de planilhas e retorna o id do job"""
+        payload = {
+            "file1": file1,
+            "column1": column1,
+            "file2": file2,
+            "column2": column2,
+        }
+        try:
+            return self.admission.submit(
+                "planilhas", payload, crew=crew_name, user_id=user_id
+            )
+        except AdmissionRejected:
+            self._remove_uploads(payload)
+            raise
+
+    def _remove_uploads(self, payload: Dict) -> None:
+        """Apaga as planilhas enviadas pela interface (só as de DATA_DIR/uploads)"""
+        uploads = (Path(self.config.data_dir) / "uploads").resolve()
+        for key in ("file1", "file2"):
+            path = Path(payload[key]).resolve()
+            if path.parent == uploads:
+                path.unlink(missing_ok=True)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Retorna o estado e o resultado de um job"""
+        return self.job_queue.get(job_id)
+
+    def _ensure_crew(self, name: str, crew_config: Dict) -> None:
+        """Recria localmente a crew descrita no job, se necessário"""
+        current = self.get_crew_info(name)
+        if current and all(
+            current.get(key) == crew_config.get(key)
+            for key in ("agent_types", "workflow")
+        ):
+            return
+        # Só neste processo: gravar um snapshot aqui traria de volta uma crew
+        # excluída na interface enquanto o job esperava na fila
+        crew = self._materialize(name, crew_config)
+        if not crew:
+            raise RuntimeError(f"Não foi possível criar a crew {name}")
+        self.crews[name] = crew
+        self.crew_configs[name] = crew_config
+
+    def run_job(self, job: Dict):
+        """Executa um job retirado da fila (usado pelos workers)"""
+        kind = job["kind"]
+        payload = job["payload"]
+        crew_name = job["crew"]
+
+        if kind == "planilhas":
+            from app.utils.planilhas import PlanilhasPipeline
+
+            # Em lotes com checkpoint: uma nova tentativa retoma do último lote
+            pipeline = PlanilhasPipeline(
+                payload["file1"],
+                payload["column1"],
+                payload["file2"],
+                payload["column2"],
+                work_dir=self.config.planilhas_dir,
+                batch_size=self.config.planilhas_batch_size,
+                on_progress=lambda progress: self.job_queue.update_progress(
+                    job["id"], progress
+                ),
+            )
+            try:
+                result = pipeline.run()
+            except Exception:
+                # Última tentativa: nenhuma outra vai retomar do checkpoint
+                if job["attempts"] >= job["max_attempts"]:
+                    pipeline.cleanup()
+                    self._remove_uploads(payload)
+                raise
+            self._remove_uploads(payload)
+            return result
+
+        if kind not in ("task", "workflow"):
+            raise ValueError(f"Tipo de job desconhecido: {kind}")
+
+        # Modelo, temperatura e hedge escolhidos na interface
+        self.agent_manager.configure_llm(
+            model=payload.get("model"), **payload.get("llm_settings", {})
+        )
+        self._ensure_crew(crew_name, payload["crew_config"])
+        if kind == "task":
+            result = self.execute_crew_task(
+                crew_name, payload["task"], model=payload.get("model")
+            )
+            if result is None:
+                raise RuntimeError(f"Falha ao executar tarefa na crew {crew_name}")
+            return {
+                "output": result,
+                "token_usage": self._job_token_usage(crew_name, 1),
+            }
+
+        workflow = payload["crew_config"]["workflow"]
+        outputs = self.execute_workflow(crew_name, model=payload.get("model"))
+        # Só etapas concluídas registram uso de tokens
+        completed = sum(1 for output in outputs if output is not None)
+        return {
+            "steps": self.workflows.get(workflow, []),
+            "outputs": outputs,
+            "token_usage": self._job_token_usage(crew_name, completed),
+        }
@@ -0,0 +1,463 @@
+"""
+Backend de memória local (SQLite + índice vetorial) para as crews
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+import numpy as np
+from crewai.memory import EntityMemory, LongTermMemory, ShortTermMemory
+from crewai.memory.memory import Memory
+from crewai.memory.storage.interface import Storage
+
+from app.utils.db import enable_wal, read_only, transaction
+
+Embedder = Callable[[List[str]], List[List[float]]]
+
+
+class HashingEmbedder:
+    """Embedder local baseado em hashing de tokens (sem chamadas de rede)"""
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r"\w+", str(text).lower()):
+                digest = hashlib.md5(token.encode("utf-8")).digest()
+                index = int.from_bytes(digest[:4], "little") % self.dimensions
+                vectors[row, index] += 1.0 if digest[4] % 2 else -1.0
+        return vectors.tolist()
+
+
+class OpenAIEmbedder:
+    """Embedder que usa a API de embeddings da OpenAI em lotes"""
+
+    def __init__(self, model: str = "text-embedding-3-small"):
+        import openai
+
+        self.model = model
+        self.client = openai.OpenAI()
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in response.data]
+
+
+def build_embedder(provider: str) -> Embedder:
+    """Cria o embedder configurado ("hashing" ou "openai")"""
+    if provider == "openai":
+        return OpenAIEmbedder()
+    return HashingEmbedder()
+
+
+class MemoryStore:
+    """Armazenamento de memórias das crews com limites, expiração e busca top-k"""
+
+    def __init__(
+        self,
+        db_path: str,
+        max_items_per_crew: int = 500,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        batch_size: int = 16,
+        top_k: int = 3,
+        embedder: Optional[Embedder] = None,
+    ):
+        self.db_path = db_path
+        self.max_items_per_crew = max_items_per_crew
+        self.ttl_seconds = ttl_seconds
+        self.batch_size = batch_size
+        self.top_k = top_k
+        self.embedder = embedder or HashingEmbedder()
+        self._lock = threading.RLock()
+        self._pending: List[Tuple[str, str, str, Dict[str, Any], float]] = []
+        self._index: Dict[Tuple[str, str], Tuple[List[int], np.ndarray]] = {}
+        self._latencies: deque = deque(maxlen=200)
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._initialize_db()
+
+    @classmethod
+    def from_config(cls, config) -> "MemoryStore":
+        """Cria o armazenamento a partir de um objeto Config"""
+        return cls(
+            db_path=config.memory_db_path,
+            max_items_per_crew=config.memory_max_items,
+            ttl_seconds=config.memory_ttl_seconds,
+            batch_size=config.memory_batch_size,
+            top_k=config.memory_top_k,
+            embedder=build_embedder(config.memory_embedder),
+        )
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        """Transação no banco de memória"""
+        return transaction(self.db_path)
+
+    def _read(self) -> ContextManager[sqlite3.Connection]:
+        """Conexão só de leitura no banco de memória"""
+        return read_only(self.db_path)
+
+    def _initialize_db(self):
+        """Cria a tabela e os índices de memória"""
+        enable_wal(self.db_path)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS memories (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    crew TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    metadata TEXT,
+                    embedding BLOB,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_memories_crew_kind "
+                "ON memories (crew, kind)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_memories_crew_accessed "
+                "ON memories (crew, last_accessed)"
+            )
+
+    def save(
+        self, crew: str, kind: str, value: Any, metadata: Optional[Dict] = None
+    ) -> None:
+        """Enfileira uma memória; a gravação ocorre em lotes"""
+        with self._lock:
+            self._pending.append((crew, kind, str(value), metadata or {}, time.time()))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """Gera embeddings do lote pendente e grava no SQLite"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            # A memória de longo prazo é buscada por igualdade, sem embedding
+            to_embed = [i for i, item in enumerate(pending) if item[1] != "long_term"]
+            vectors = (
+                self.embedder([pending[i][2] for i in to_embed]) if to_embed else []
+            )
+            blobs: Dict[int, bytes] = {
+                i: np.asarray(vector, dtype=np.float32).tobytes()
+                for i, vector in zip(to_embed, vectors)
+            }
+            rows = []
+            for i, (crew, kind, value, metadata, created_at) in enumerate(pending):
+                rows.append(
+                    (
+                        crew,
+                        kind,
+                        value,
+                        json.dumps(metadata, default=str),
+                        blobs.get(i),
+                        created_at,
+                        created_at,
+                    )
+                )
+            with self._connect() as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO memories
+                        (crew, kind, value, metadata, embedding,
+                         created_at, last_accessed)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+            for crew, kind in {(item[0], item[1]) for item in pending}:
+                self._index.pop((crew, kind), None)
+            for crew in {item[0] for item in pending}:
+                self.evict(crew)
+
+    def evict(self, crew: str) -> int:
+        """Remove memórias expiradas e as menos usadas acima do limite"""
+        removed = 0
+        with self._lock, self._connect() as conn:
+            if self.ttl_seconds:
+                cursor = conn.execute(
+                    "DELETE FROM memories WHERE crew = ? AND created_at < ?",
+                    (crew, time.time() - self.ttl_seconds),
+                )
+                removed += cursor.rowcount
+            if self.max_items_per_crew:
+                cursor = conn.execute(
+                    """
+                    DELETE FROM memories WHERE id IN (
+                        SELECT id FROM memories WHERE crew = ?
+                        ORDER BY last_accessed DESC, id DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (crew, self.max_items_per_crew),
+                )
+                removed += cursor.rowcount
+            if removed:
+                self._drop_index(crew)
+        return removed
+
+    def _drop_index(self, crew: str):
+        for key in [key for key in self._index if key[0] == crew]:
+            del self._index[key]
+
+    def _load_index(self, crew: str, kind: str) -> Tuple[List[int], np.ndarray]:
+        """Carrega (e mantém em cache) a matriz normalizada de embeddings"""
+        key = (crew, kind)
+        if key not in self._index:
+            with self._read() as conn:
+                rows = conn.execute(
+                    "SELECT id, embedding FROM memories "
+                    "WHERE crew = ? AND kind = ? AND embedding IS NOT NULL",
+                    (crew, kind),
+                ).fetchall()
+            ids = [row[0] for row in rows]
+            if rows:
+                matrix = np.vstack(
+                    [np.frombuffer(row[1], dtype=np.float32) for row in rows]
+                )
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix = matrix / np.where(norms == 0, 1.0, norms)
+            else:
+                matrix = np.zeros((0, 0), dtype=np.float32)
+            self._index[key] = (ids, matrix)
+        return self._index[key]
+
+    def search(
+        self,
+        crew: str,
+        kind: str,
+        query: str,
+        limit: Optional[int] = None,
+        score_threshold: float = 0.35,
+    ) -> List[Dict[str, Any]]:
+        """Retorna as memórias mais similares à consulta (top-k)"""
+        start = time.perf_counter()
+        with self._lock:
+            self.flush()
+            ids, matrix = self._load_index(crew, kind)
+            results: List[Dict[str, Any]] = []
+            if ids:
+                vector = np.asarray(self.embedder([query])[0], dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                if norm:
+                    scores = matrix @ (vector / norm)
+                    k = min(limit or self.top_k, len(ids))
+                    top = np.argsort(-scores)[:k]
+                    selected = [
+                        (ids[i], float(scores[i]))
+                        for i in top
+                        if scores[i] >= score_threshold
+                    ]
+                    results = self._fetch(selected)
+        self._latencies.append((time.perf_counter() - start) * 1000)
+        return results
+
+    def _fetch(self, selected: List[Tuple[int, float]]) -> List[Dict[str, Any]]:
+        """Lê as memórias selecionadas e atualiza o último acesso (LRU)"""
+        if not selected:
+            return []
+        scores = dict(selected)
+        placeholders = ",".join("?" for _ in selected)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, value, metadata FROM memories "
+                f"WHERE id IN ({placeholders})",
+                list(scores),
+            ).fetchall()
+            conn.execute(
+                f"UPDATE memories SET last_accessed = ? WHERE id IN ({placeholders})",
+                [time.time(), *scores],
+            )
+        results = []
+        for memory_id, value, metadata in rows:
+            metadata = json.loads(metadata) if metadata else {}
+            metadata["score"] = scores[memory_id]
+            results.append({"context": value, "metadata": metadata})
+        results.sort(key=lambda result: -result["metadata"]["score"])
+        return results
+
+    def load_latest(
+        self, crew: str, kind: str, value: str, latest_n: int
+    ) -> List[Dict[str, Any]]:
+        """Retorna as memórias mais recentes com o valor exato informado"""
+        start = time.perf_counter()
+        with self._lock:
+            self.flush()
+            with self._connect() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT id, metadata FROM memories
+                    WHERE crew = ? AND kind = ? AND value = ?
+                    ORDER BY created_at DESC, id DESC LIMIT ?
+                    """,
+                    (crew, kind, value, latest_n),
+                ).fetchall()
+                if rows:
+                    placeholders = ",".join("?" for _ in rows)
+                    conn.execute(
+                        f"UPDATE memories SET last_accessed = ? "
+                        f"WHERE id IN ({placeholders})",
+                        [time.time(), *[row[0] for row in rows]],
+                    )
+        self._latencies.append((time.perf_counter() - start) * 1000)
+        return [json.loads(row[1]) for row in rows]
+
+    def delete_crew(self, crew: str) -> None:
+        """Remove todas as memórias de uma crew"""
+        with self._lock:
+            self._pending = [item for item in self._pending if item[0] != crew]
+            with self._connect() as conn:
+                conn.execute("DELETE FROM memories WHERE crew = ?", (crew,))
+            self._drop_index(crew)
+
+    def count(self, crew: Optional[str] = None) -> int:
+        """Quantidade de memórias gravadas (total ou por crew)"""
+        with self._lock:
+            self.flush()
+            with self._read() as conn:
+                if crew is None:
+                    row = conn.execute("SELECT COUNT(*) FROM memories").fetchone()
+                else:
+                    row = conn.execute(
+                        "SELECT COUNT(*) FROM memories WHERE crew = ?", (crew,)
+                    ).fetchone()
+        return row[0]
+
+    def size_bytes(self) -> int:
+        """Tamanho do banco em disco, incluindo o arquivo WAL"""
+        total = 0
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            if os.path.exists(path):
+                total += os.path.getsize(path)
+        return total
+
+    def get_stats(self) -> Dict[str, float]:
+        """Métricas de tamanho e latência de recuperação para o dashboard"""
+        latencies = sorted(self._latencies)
+        if latencies:
+            avg_ms = sum(latencies) / len(latencies)
+            p95_ms = latencies[max(0, math.ceil(len(latencies) * 0.95) - 1)]
+        else:
+            avg_ms = p95_ms = 0.0
+        return {
+            "items": self.count(),
+            "size_bytes": self.size_bytes(),
+            "retrieval_avg_ms": avg_ms,
+            "retrieval_p95_ms": p95_ms,
+            "retrievals": len(latencies),
+        }
+
+    def attach(self, crew, crew_name: str) -> None:
+        """Ativa a memória da crew usando este armazenamento"""
+        crew.memory = True
+        crew._short_term_memory = CrewShortTermMemory(self, crew_name)
+        crew._long_term_memory = CrewLongTermMemory(self, crew_name)
+        crew._entity_memory = CrewEntityMemory(self, crew_name)
+
+
+def combine_memory_stats(stats: List[Dict[str, float]]) -> Dict[str, float]:
+    """Junta as métricas de memória de vários processos (o banco é compartilhado)
+
+    O p95 combinado é o maior p95 entre os processos, uma estimativa conservadora.
+    """
+    total = {
+        "items": 0,
+        "size_bytes": 0,
+        "retrieval_avg_ms": 0.0,
+        "retrieval_p95_ms": 0.0,
+        "retrievals": 0,
+    }
+    for entry in stats:
+        total["items"] = max(total["items"], entry.get("items", 0))
+        total["size_bytes"] = max(total["size_bytes"], entry.get("size_bytes", 0))
+        retrievals = entry.get("retrievals", 0)
+        if not retrievals:
+            continue
+        total["retrieval_avg_ms"] += entry["retrieval_avg_ms"] * retrievals
+        total["retrieval_p95_ms"] = max(
+            total["retrieval_p95_ms"], entry["retrieval_p95_ms"]
+        )
+        total["retrievals"] += retrievals
+    if total["retrievals"]:
+        total["retrieval_avg_ms"] /= total["retrievals"]
+    return total
+
+
+class CrewMemoryStorage(Storage):
+    """Adaptador da interface Storage do crewai para o MemoryStore"""
+
+    def __init__(self, store: MemoryStore, crew: str, kind: str):
+        self.store = store
+        self.crew = crew
+        self.kind = kind
+
+    def save(self, value: Any, metadata: Dict[str, Any]) -> None:
+        self.store.save(self.crew, self.kind, value, metadata)
+
+    def search(
+        self, query: str, limit: Optional[int] = None, score_threshold: float = 0.35
+    ) -> List[Dict[str, Any]]:
+        return self.store.search(
+            self.crew, self.kind, query, limit=limit, score_threshold=score_threshold
+        )
+
+
+class CrewLongTermStorage:
+    """Adaptador da memória de longo prazo do crewai para o MemoryStore"""
+
+    def __init__(self, store: MemoryStore, crew: str):
+        self.store = store
+        self.crew = crew
+
+    def save(
+        self, task_description: str, metadata: Dict[str, Any], datetime: str, score
+    ) -> None:
+        self.store.save(
+            self.crew,
+            "long_term",
+            task_description,
+            {"metadata": metadata, "datetime": datetime, "score": score},
+        )
+
+    def load(self, task_description: str, latest_n: int) -> Optional[List[Dict]]:
+        rows = self.store.load_latest(
+            self.crew, "long_term", task_description, latest_n
+        )
+        return rows or None
+
+
+class CrewShortTermMemory(ShortTermMemory):
+    """Memória de curto prazo da crew gravada no MemoryStore"""
+
+    def __init__(self, store: MemoryStore, crew: str):
+        Memory.__init__(self, CrewMemoryStorage(store, crew, "short_term"))
+
+
+class CrewEntityMemory(EntityMemory):
+    """Memória de entidades da crew gravada no MemoryStore"""
+
+    def __init__(self, store: MemoryStore, crew: str):
+        Memory.__init__(self, CrewMemoryStorage(store, crew, "entities"))
+
+
+class CrewLongTermMemory(LongTermMemory):
+    """Memória de longo prazo da crew gravada no MemoryStore"""
+
+    def __init__(self, store: MemoryStore, crew: str):
+        Memory.__init__(self, CrewLongTermStorage(store, crew))
@@ -0,0 +1,313 @@
+"""
+Snapshots versionados (SQLite) das configurações de crews e agentes
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from typing import Any, ContextManager, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.db import enable_wal, read_only, transaction
+
+
+class SnapshotStore:
+    """Histórico versionado de configurações, com remoção por tombstone
+
+    Cada alteração grava uma nova versão da configuração; remover grava um
+    tombstone. ``compact`` descarta os itens removidos e as versões antigas.
+    """
+
+    def __init__(self, db_path: str, keep_versions: int = 5):
+        self.db_path = db_path
+        self.keep_versions = keep_versions
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._initialize_db()
+
+    @classmethod
+    def from_config(cls, config) -> "SnapshotStore":
+        """Cria o armazenamento a partir de um objeto Config"""
+        return cls(
+            db_path=config.snapshot_db_path,
+            keep_versions=config.snapshot_keep_versions,
+        )
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        """Transação no banco de snapshots"""
+        return transaction(self.db_path)
+
+    def _read(self) -> ContextManager[sqlite3.Connection]:
+        """Conexão só de leitura no banco de snapshots"""
+        return read_only(self.db_path)
+
+    def _initialize_db(self):
+        """Cria a tabela de snapshots"""
+        enable_wal(self.db_path)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    config TEXT,
+                    deleted INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    UNIQUE (kind, name, version)
+                )
+                """
+            )
+
+    @staticmethod
+    def _latest_row(
+        conn: sqlite3.Connection, kind: str, name: str
+    ) -> Optional[sqlite3.Row]:
+        return conn.execute(
+            "SELECT * FROM snapshots WHERE kind = ? AND name = ? "
+            "ORDER BY version DESC LIMIT 1",
+            (kind, name),
+        ).fetchone()
+
+    def _write(
+        self,
+        conn: sqlite3.Connection,
+        kind: str,
+        name: str,
+        config: Optional[Dict[str, Any]],
+    ) -> int:
+        """Grava uma nova versão (ou tombstone, se config for None)"""
+        latest = self._latest_row(conn, kind, name)
+        data = json.dumps(config, sort_keys=True) if config is not None else None
+        if latest is not None:
+            unchanged = (
+                latest["deleted"] == 0 and latest["config"] == data
+                if config is not None
+                else latest["deleted"] == 1
+            )
+            if unchanged:
+                return latest["version"]
+        elif config is None:
+            return 0
+        version = latest["version"] + 1 if latest is not None else 1
+        conn.execute(
+            "INSERT INTO snapshots (kind, name, version, config, deleted, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, name, version, data, int(config is None), time.time()),
+        )
+        return version
+
+    def save(self, kind: str, name: str, config: Dict[str, Any]) -> int:
+        """Grava a configuração e retorna sua versão (a mesma, se nada mudou)"""
+        with self._connect() as conn:
+            return self._write(conn, kind, name, config)
+
+    def save_many(self, kind: str, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """Grava várias configurações em uma única transação"""
+        count = 0
+        with self._connect() as conn:
+            for name, config in items:
+                self._write(conn, kind, name, config)
+                count += 1
+        return count
+
+    def delete(self, kind: str, name: str) -> None:
+        """Marca o item como removido (tombstone)"""
+        with self._connect() as conn:
+            self._write(conn, kind, name, None)
+
+    def load_latest(self, kind: str) -> Dict[str, Dict[str, Any]]:
+        """Última versão de cada item não removido, na ordem de criação"""
+        with self._read() as conn:
+            rows = conn.execute(
+                """
+                SELECT s.name, s.config FROM snapshots s
+                JOIN (
+                    SELECT name, MAX(version) AS version FROM snapshots
+                    WHERE kind = ? GROUP BY name
+                ) latest ON s.name = latest.name AND s.version = latest.version
+                WHERE s.kind = ? AND s.deleted = 0
+                ORDER BY (
+                    SELECT MIN(id) FROM snapshots f
+                    WHERE f.kind = s.kind AND f.name = s.name
+                )
+                """,
+                (kind, kind),
+            ).fetchall()
+        return {row["name"]: json.loads(row["config"]) for row in rows}
+
+    def history(self, kind: str, name: str) -> List[Dict[str, Any]]:
+        """Versões gravadas de um item, da mais recente para a mais antiga"""
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT version, deleted, created_at FROM snapshots "
+                "WHERE kind = ? AND name = ? ORDER BY version DESC",
+                (kind, name),
+            ).fetchall()
+        return [
+            {
+                "version": row["version"],
+                "deleted": bool(row["deleted"]),
+                "created_at": row["created_at"],
+            }
+            for row in rows
+        ]
+
+    def restore(self, kind: str, name: str, version: int) -> Optional[Dict[str, Any]]:
+        """Torna uma versão anterior a atual (gravando-a como nova versão)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT config FROM snapshots "
+                "WHERE kind = ? AND name = ? AND version = ? AND deleted = 0",
+                (kind, name, version),
+            ).fetchone()
+            if row is None:
+                return None
+            config = json.loads(row["config"])
+            self._write(conn, kind, name, config)
+        return config
+
+    def stale_count(self) -> int:
+        """Linhas que a compactação removeria (versões antigas e tombstones)"""
+        with self._read() as conn:
+            return conn.execute(
+                """
+                SELECT COUNT(*) FROM snapshots s
+                JOIN (
+                    SELECT kind, name, MAX(version) AS version,
+                           MAX(CASE WHEN deleted = 1 THEN version END) AS tombstone
+                    FROM snapshots GROUP BY kind, name
+                ) latest ON s.kind = latest.kind AND s.name = latest.name
+                WHERE latest.tombstone = latest.version
+                   OR s.version <= latest.version - ?
+                """,
+                (self.keep_versions,),
+            ).fetchone()[0]
+
+    def compact(self) -> int:
+        """Remove itens excluídos e versões além de keep_versions; retorna o total"""
+        with self._connect() as conn:
+            # Itens cuja última versão é um tombstone (removidos com delete_crew)
+            removed = conn.execute(
+                """
+                DELETE FROM snapshots WHERE (kind, name) IN (
+                    SELECT kind, name FROM snapshots s
+                    WHERE deleted = 1 AND version = (
+                        SELECT MAX(version) FROM snapshots m
+                        WHERE m.kind = s.kind AND m.name = s.name
+                    )
+                )
+                """
+            ).rowcount
+            removed += conn.execute(
+                """
+                DELETE FROM snapshots WHERE version <= (
+                    SELECT MAX(version) FROM snapshots m
+                    WHERE m.kind = snapshots.kind AND m.name = snapshots.name
+                ) - ?
+                """,
+                (self.keep_versions,),
+            ).rowcount
+        if removed:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                conn.execute("VACUUM")
+        return removed
+
+    def count(self, kind: Optional[str] = None) -> int:
+        """Número de linhas gravadas (todas as versões)"""
+        with self._read() as conn:
+            if kind is None:
+                return conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+            return conn.execute(
+                "SELECT COUNT(*) FROM snapshots WHERE kind = ?", (kind,)
+            ).fetchone()[0]
+
+
+def benchmark_startup(num_crews: int = 1000, sample: int = 10) -> Dict[str, float]:
+    """Mede a inicialização do CrewManager com num_crews crews salvas
+
+    Compara a restauração preguiçosa (só configurações) com o custo estimado de
+    materializar todas as crews do CrewAI na inicialização.
+    """
+    from app.agents.agent_manager import AgentManager
+    from app.crews.crew_manager import CrewManager
+    from app.crews.memory import MemoryStore
+    from app.utils.config import Config
+    from app.utils.job_queue import JobQueue
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Config()
+        config.snapshot_db_path = os.path.join(tmp, "snapshots.db")
+        memory_store = MemoryStore(os.path.join(tmp, "memory.db"))
+        job_queue = JobQueue(os.path.join(tmp, "jobs.db"))
+        store = SnapshotStore.from_config(config)
+        store.save_many(
+            "crew",
+            (
+                (
+                    f"crew_{i:04d}",
+                    {
+                        "description": f"Crew de benchmark {i}",
+                        "agent_types": ["researcher", "writer"],
+                        "created_at": "2025-01-01T00:00:00",
+                        "workflow": None,
+                    },
+                )
+                for i in range(num_crews)
+            ),
+        )
+
+        start = time.perf_counter()
+        manager = CrewManager(
+            AgentManager(config),
+            memory_store=memory_store,
+            config=config,
+            job_queue=job_queue,
+            snapshot_store=store,
+        )
+        restore_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        materialized = 0
+        for name in manager.list_crew_names()[:sample]:
+            if manager.get_crew(name) is not None:
+                materialized += 1
+        materialize_seconds = (time.perf_counter() - start) / max(materialized, 1)
+
+        return {
+            "crews": len(manager.list_crew_names()),
+            "restore_seconds": restore_seconds,
+            "materialize_seconds_per_crew": materialize_seconds,
+            "eager_seconds_estimate": restore_seconds + materialize_seconds * num_crews,
+        }
+
+
+def main(argv=None) -> None:
+    """Executa o benchmark de inicialização"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark de inicialização com crews salvas"
+    )
+    parser.add_argument("--crews", type=int, default=1000)
+    parser.add_argument("--sample", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    result = benchmark_startup(args.crews, args.sample)
+    print(f"Crews restauradas: {result['crews']}")
+    print(f"Inicialização (restauração preguiçosa): {result['restore_seconds']:.3f} s")
+    print(
+        "Materialização por crew (primeira execução): "
+        f"{result['materialize_seconds_per_crew'] * 1000:.1f} ms"
+    )
+    print(
+        "Inicialização estimada materializando todas: "
+        f"{result['eager_seconds_estimate']:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,29 @@ Aplicação principal do sistema de agentes inteligentes
 
 import sys
 import os
+import functools
+import time
+import uuid
 from pathlib import Path
+from typing import Optional
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import streamlit as st
 from dotenv import load_dotenv
 from app.agents.agent_manager import AgentManager
+from app.agents.llm import combine_hedge_stats
+from app.agents.tool_registry import combine_tool_stats
 from app.crews.crew_manager import CrewManager
+from app.crews.memory import combine_memory_stats
+from app.utils.admission import AdmissionRejected
 from app.utils.config import Config
+from app.utils.view_models import (
+    RenderTimer,
+    ViewModelCache,
+    build_agent_rows,
+    build_crew_rows,
+)
 
 # Carregar variáveis de ambiente
 env_path = Path(__file__).resolve().parent.parent / ".env"
@@ -27,6 +41,40 @@ st.set_page_config(
 )
 
 
+CREWS_PER_PAGE = 20
+
+
+def get_view_models() -> ViewModelCache:
+    """Cache de view models da sessão"""
+    if "view_models" not in st.session_state:
+        st.session_state.view_models = ViewModelCache()
+    return st.session_state.view_models
+
+
+def get_render_timer() -> RenderTimer:
+    """Medidor de tempo dos reruns da sessão"""
+    if "render_timer" not in st.session_state:
+        st.session_state.render_timer = RenderTimer()
+    return st.session_state.render_timer
+
+
+def timed_fragment(name: str, run_every: Optional[float] = None):
+    """Transforma a seção em um fragmento que reexecuta sozinho e mede seu tempo"""
+
+    def decorator(func):
+        @st.fragment(run_every=run_every)
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_render_timer().section(name) as timing:
+                func(*args, **kwargs)
+            if st.session_state.get("show_timings"):
+                st.caption(f"⏱️ {name}: {timing['ms']:.1f} ms")
+
+        return wrapper
+
+    return decorator
+
+
 def main():
     """Função principal da aplicação"""
 
@@ -35,6 +83,25 @@ def main():
         st.session_state.agent_manager = AgentManager()
     if "crew_manager" not in st.session_state:
         st.session_state.crew_manager = CrewManager(st.session_state.agent_manager)
+    if "session_user_id" not in st.session_state:
+        # Cada navegador tem sua própria cota na fila se o usuário não for
+        # informado; o identificador fica na URL para sobreviver a um refresh
+        user_id = st.query_params.get("usuario") or f"sessao-{uuid.uuid4().hex[:8]}"
+        st.query_params["usuario"] = user_id
+        st.session_state.session_user_id = user_id
+        st.session_state.user_id = user_id
+
+    timer = get_render_timer()
+    timer.start_run()
+    try:
+        render_app()
+    finally:
+        timer.end_run()
+        show_timing_overlay(timer)
+
+
+def render_app():
+    """Renderiza o cabeçalho, a barra lateral e as abas"""
 
     # Header
     st.title("🤖 APP_AGENTES")
@@ -55,11 +122,45 @@ def main():
 
         # Configurações do modelo
         model = st.selectbox(
-            "Modelo", ["gpt-4o", "gpt-4", "gpt-3.5-turbo", "gpt-4-turbo"], index=0
+            "Modelo",
+            ["gpt-4o", "gpt-4", "gpt-3.5-turbo", "gpt-4-turbo"],
+            index=0,
+            key="model",
         )
 
         temperature = st.slider(
-            "Temperatura", min_value=0.0, max_value=2.0, value=0.7, step=0.1
+            "Temperatura",
+            min_value=0.0,
+            max_value=2.0,
+            value=0.7,
+            step=0.1,
+            key="temperature",
+        )
+
+        # Hedge: requisição duplicada quando o modelo demora além do p95
+        config = st.session_state.crew_manager.config
+        st.checkbox(
+            "Requisições hedged",
+            value=config.llm_hedge_enabled,
+            key="hedge",
+            help="Dispara uma requisição duplicada quando a resposta demora "
+            "mais que o percentil configurado da latência observada",
+        )
+        st.selectbox(
+            "Modelo de fallback (hedge)",
+            ["Mesmo modelo", "gpt-4o", "gpt-4", "gpt-3.5-turbo", "gpt-4-turbo"],
+            key="fallback_model",
+            disabled=not st.session_state.get("hedge"),
+        )
+
+        # Usuário para os limites e o fair queueing da fila de execução.
+        # Não há autenticação: serve para separar cotas, não para isolar usuários
+        st.text_input(
+            "Usuário",
+            key="user_id",
+            help="Identifica a sua cota na fila de execução. Por padrão, um "
+            "identificador gerado para este navegador e guardado na URL.",
+            on_change=remember_user_id,
         )
 
     # Tabs principais
@@ -80,22 +181,112 @@ def main():
         show_execution_tab()
 
 
+def remember_user_id():
+    """Guarda na URL o usuário digitado, para ele valer após um refresh"""
+    if st.session_state.user_id:
+        st.query_params["usuario"] = st.session_state.user_id
+
+
+def show_timing_overlay(timer: RenderTimer):
+    """Exibe na barra lateral o tempo do último rerun e de cada seção"""
+    with st.sidebar:
+        st.checkbox("⏱️ Mostrar tempos de renderização", key="show_timings")
+        if not st.session_state.get("show_timings"):
+            return
+        run = timer.last_full_run()
+        if run:
+            st.metric("Último rerun completo", f"{run['total_ms']:.0f} ms")
+            for section, elapsed in run["sections"].items():
+                st.caption(f"{section}: {elapsed:.1f} ms")
+        fragments = [r for r in timer.recent() if r["scope"] != "app"][:5]
+        if fragments:
+            st.caption("Reruns parciais recentes:")
+            for fragment in fragments:
+                st.caption(f"↻ {fragment['scope']}: {fragment['total_ms']:.1f} ms")
+        view_models = get_view_models()
+        st.caption(
+            f"View models: {view_models.hits} reaproveitados, "
+            f"{view_models.misses} recalculados"
+        )
+
+
+@timed_fragment("Dashboard")
 def show_dashboard():
     """Exibe o dashboard principal"""
     st.header("📊 Dashboard")
 
+    agent_manager = st.session_state.agent_manager
+    crew_manager = st.session_state.crew_manager
+    view_models = get_view_models()
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        agent_rows = view_models.get(
+            "agents", agent_manager.version, lambda: build_agent_rows(agent_manager)
+        )
+        st.metric("Agentes Disponíveis", f"{len(agent_rows)}")
+
+    with col2:
+        crew_names = view_models.get(
+            "crew_names", crew_manager.version, crew_manager.list_crew_names
+        )
+        st.metric("Crews Criadas", f"{len(crew_names)}")
+
+    with col3:
+        job_stats = st.session_state.crew_manager.job_queue.stats()
+        st.metric(
+            "Tarefas Executadas",
+            f"{job_stats['done']}",
+            help=f"Na fila: {job_stats['queued']} · "
+            f"em execução: {job_stats['running']} · "
+            f"com falha: {job_stats['failed']}",
+        )
+
+    # Filas por lane: tarefas interativas e workflows em lote
+    st.subheader("🚦 Filas")
+
+    lane_stats = crew_manager.admission.get_stats()["lanes"]
+    lane_names = {"interactive": "Interativa", "batch": "Lote"}
+    st.table(
+        [
+            {
+                "Lane": lane_names.get(lane, lane),
+                "Na fila": values["queued"],
+                "Espera (p95)": f"{values['wait_p95']:.1f} s",
+                "Latência (p95)": f"{values['latency_p95']:.1f} s",
+                "Concluídos": values["completed"],
+            }
+            for lane, values in lane_stats.items()
+        ]
+    )
+
+    st.markdown("---")
+
+    # Memória das crews
+    st.subheader("🧠 Memória das Crews")
+
+    # As recuperações acontecem nos workers; cada um publica suas métricas
+    workers = crew_manager.job_queue.list_workers()
+    memory_stats = combine_memory_stats(
+        [crew_manager.get_memory_stats()]
+        + [worker["stats"].get("memory", {}) for worker in workers]
+    )
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        num_agents = len(st.session_state.agent_manager.list_available_agent_types())
-        st.metric("Agentes Disponíveis", f"{num_agents}")
+        st.metric("Itens em Memória", f"{memory_stats['items']}")
 
     with col2:
-        num_crews = len(st.session_state.crew_manager.list_crew_names())
-        st.metric("Crews Criadas", f"{num_crews}")
+        size_mb = memory_stats["size_bytes"] / (1024 * 1024)
+        st.metric("Tamanho do Armazenamento", f"{size_mb:.2f} MB")
 
     with col3:
-        st.metric("Tarefas Executadas", "12")
+        st.metric(
+            "Latência de Recuperação (p95)",
+            f"{memory_stats['retrieval_p95_ms']:.1f} ms",
+            help=f"Média: {memory_stats['retrieval_avg_ms']:.1f} ms "
+            f"em {memory_stats['retrievals']} consultas",
+        )
 
     st.markdown("---")
 
@@ -112,22 +303,73 @@ def show_dashboard():
     except Exception as e:
         st.error(f"❌ Erro na conexão com OpenAI: {str(e)}")
 
+    if workers:
+        st.success(f"✅ {len(workers)} worker(s) ativo(s)")
+    else:
+        st.warning("⚠️ Nenhum worker ativo. Inicie com `python -m app.worker`")
+
+    # Hedge de requisições ao LLM (agregado dos workers)
+    st.subheader("⚡ Hedge de Requisições")
+
+    hedge_stats = combine_hedge_stats(
+        [worker["stats"].get("llm", {}) for worker in workers]
+    )
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("Chamadas ao LLM", f"{hedge_stats['requests']}")
+
+    with col2:
+        st.metric(
+            "Taxa de Hedge",
+            f"{hedge_stats['hedge_rate']:.1%}",
+            help=f"Hedges vencedores: {hedge_stats['hedge_wins']}",
+        )
+
+    with col3:
+        st.metric(
+            "Latência Economizada (estimada)", f"{hedge_stats['saved_seconds']:.1f} s"
+        )
+
+    # Execução de ferramentas (agregado dos workers)
+    st.subheader("🛠️ Ferramentas")
+
+    tool_stats = combine_tool_stats(
+        [worker["stats"].get("tools", {}) for worker in workers]
+    )
+    if tool_stats:
+        st.table(
+            [
+                {
+                    "Ferramenta": tool_name,
+                    "Chamadas": int(values["calls"]),
+                    "Reaproveitadas": int(values["reused"]),
+                    "Tempo médio (ms)": f"{values['avg_ms']:.1f}",
+                }
+                for tool_name, values in sorted(tool_stats.items())
+            ]
+        )
+    else:
+        st.info("Nenhuma ferramenta executada ainda")
+
 
+@timed_fragment("Agentes")
 def show_agents_tab():
     """Exibe a aba de gerenciamento de agentes"""
     st.header("🤖 Gerenciamento de Agentes")
 
     # Lista de agentes disponíveis dinamicamente
     manager = st.session_state.agent_manager
-    for agent_type in manager.list_available_agent_types():
-        info = manager.get_agent_info(agent_type) or {}
-        name = info.get("name", agent_type)
-        role = info.get("role", "-")
-        tools = ", ".join(manager.get_agent_tools(agent_type))
+    rows = get_view_models().get(
+        "agents", manager.version, lambda: build_agent_rows(manager)
+    )
+    for row in rows:
+        agent_type = row["type"]
+        name = row["name"]
         with st.expander(f"🤖 {name}"):
-            st.write(f"**Função:** {role}")
-            if tools:
-                st.write(f"**Ferramentas:** {tools}")
+            st.write(f"**Função:** {row['role']}")
+            if row["tools"]:
+                st.write(f"**Ferramentas:** {row['tools']}")
 
             col1, col2 = st.columns(2)
             with col1:
@@ -144,10 +386,21 @@ def show_agents_tab():
 def show_crews_tab():
     """Exibe a aba de gerenciamento de crews"""
     st.header("👥 Gerenciamento de Crews")
+    show_crew_form()
+    st.markdown("---")
+    show_crew_list()
+
 
-    # Criar nova crew
+@timed_fragment("Criar crew")
+def show_crew_form():
+    """Formulário de criação de crews"""
     st.subheader("➕ Criar Nova Crew")
 
+    # Mensagem da criação anterior (a criação reexecuta a aplicação inteira)
+    created = st.session_state.pop("crew_created", None)
+    if created:
+        st.success(f"Crew '{created}' criada com sucesso!")
+
     crew_name = st.text_input("Nome da Crew")
     crew_description = st.text_area("Descrição")
 
@@ -170,33 +423,53 @@ def show_crews_tab():
 
     if st.button("Criar Crew"):
         if crew_name and selected_agents:
-            crew = st.session_state.crew_manager.create_crew(
+            crew = crew_manager.create_crew(
                 crew_name,
                 selected_agents,
                 crew_description,
                 workflow=workflow_choice,
             )
             if crew:
-                st.success(f"Crew '{crew_name}' criada com sucesso!")
+                # A nova crew aparece no dashboard, na lista e na execução
+                st.session_state.crew_created = crew_name
+                st.rerun()
             else:
                 st.error("Erro ao criar a crew")
         else:
             st.error("Preencha o nome da crew e selecione pelo menos um agente")
 
-    st.markdown("---")
 
-    # Lista de crews existentes
+@timed_fragment("Lista de crews")
+def show_crew_list():
+    """Lista paginada das crews existentes"""
     st.subheader("📋 Crews Existentes")
 
-    existing_crews = st.session_state.crew_manager.get_all_crews()
+    crew_manager = st.session_state.crew_manager
+    agent_manager = st.session_state.agent_manager
+    rows = get_view_models().get(
+        "crews",
+        (crew_manager.version, agent_manager.version),
+        lambda: build_crew_rows(crew_manager, agent_manager),
+    )
 
-    for name, crew in existing_crews.items():
-        agents_names = [agent.role for agent in crew.agents]
-        workflow = st.session_state.crew_manager.get_crew_info(name).get("workflow")
+    query = st.text_input("Filtrar crews", key="crew_filter").strip().lower()
+    if query:
+        rows = [row for row in rows if query in row["name"].lower()]
+    pages = max(1, -(-len(rows) // CREWS_PER_PAGE))
+    page = 1
+    if pages > 1:
+        page = st.number_input("Página", min_value=1, max_value=pages, value=1)
+        st.caption(f"{len(rows)} crews · página {page} de {pages}")
+
+    start = (page - 1) * CREWS_PER_PAGE
+    for row in rows[start : start + CREWS_PER_PAGE]:
+        name = row["name"]
         with st.expander(f"👥 {name}"):
-            st.write(f"**Agentes:** {', '.join(agents_names)}")
-            if workflow:
-                st.write(f"**Workflow:** {workflow}")
+            st.write(f"**Agentes:** {row['agents']}")
+            if row["workflow"]:
+                st.write(f"**Workflow:** {row['workflow']}")
+            if row["created_at"]:
+                st.caption(f"Criada em {row['created_at']}")
 
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -209,18 +482,28 @@ def show_crews_tab():
 
             with col3:
                 if st.button(f"Deletar {name}", key=f"delete_{name}"):
-                    st.info(f"Deleção da crew {name} em desenvolvimento")
+                    crew_manager.delete_crew(name)
+                    st.rerun()
 
 
 def show_execution_tab():
     """Exibe a aba de execução de tarefas"""
     st.header("📊 Execução de Tarefas")
+    show_task_form()
+    st.markdown("---")
+    show_job_history()
+
 
+@timed_fragment("Nova tarefa")
+def show_task_form():
+    """Formulário de envio de tarefas, workflows e comparações de planilhas"""
     # Seleção da crew
     st.subheader("🎯 Nova Tarefa")
 
     crew_manager = st.session_state.crew_manager
-    crews = crew_manager.list_crew_names()
+    crews = get_view_models().get(
+        "crew_names", crew_manager.version, crew_manager.list_crew_names
+    )
     selected_crew = st.selectbox("Selecionar Crew", crews)
 
     # Input da tarefa
@@ -230,7 +513,9 @@ def show_execution_tab():
     )
 
     # Campos extras para análise de planilhas
-    if selected_crew == "Crew de Análise de Planilhas":
+    crew_info = crew_manager.get_crew_info(selected_crew) if selected_crew else None
+    workflow = crew_info.get("workflow") if crew_info else None
+    if workflow == "planilhas":
         file1 = st.file_uploader("Arquivo Excel 1", type=["xlsx"], key="excel1")
         column1 = st.text_input("Coluna do Arquivo 1")
         file2 = st.file_uploader("Arquivo Excel 2", type=["xlsx"], key="excel2")
@@ -247,85 +532,163 @@ def show_execution_tab():
     with col2:
         verbose = st.checkbox("Modo Verbose", value=True)
 
-    # Botão de execução
+    # Botão de execução: os jobs são executados pelos workers (python -m app.worker)
     if st.button("🚀 Executar Tarefa", type="primary"):
-        crew_info = crew_manager.get_crew_info(selected_crew)
-        workflow = crew_info.get("workflow") if crew_info else None
-        if workflow == "planilhas":
-            if file1 and file2 and column1 and column2:
-                with st.spinner(f"Executando tarefa com a '{selected_crew}'..."):
-                    tmp1 = Path("/tmp/file1.xlsx")
+        model = st.session_state.get("model")
+        fallback_model = st.session_state.get("fallback_model")
+        llm_settings = {
+            "temperature": st.session_state.get("temperature"),
+            "hedge": st.session_state.get("hedge"),
+            "fallback_model": (
+                None if fallback_model == "Mesmo modelo" else fallback_model
+            ),
+        }
+        user_id = st.session_state.get("user_id") or st.session_state.session_user_id
+        job_id = None
+        try:
+            if workflow == "planilhas":
+                if file1 and file2 and column1 and column2:
+                    uploads = crew_manager.config.data_dir / "uploads"
+                    uploads.mkdir(parents=True, exist_ok=True)
+                    tmp1 = uploads / f"{uuid.uuid4().hex}_{file1.name}"
                     tmp1.write_bytes(file1.getbuffer())
-                    tmp2 = Path("/tmp/file2.xlsx")
+                    tmp2 = uploads / f"{uuid.uuid4().hex}_{file2.name}"
                     tmp2.write_bytes(file2.getbuffer())
-                    from app.utils.tools import (
-                        read_excel_column,
-                        compare_text_similarity,
+                    job_id = crew_manager.submit_planilhas(
+                        selected_crew,
+                        str(tmp1),
+                        column1,
+                        str(tmp2),
+                        column2,
+                        user_id=user_id,
                     )
-
-                    list1 = read_excel_column(str(tmp1), column1)
-                    list2 = read_excel_column(str(tmp2), column2)
-                    result = compare_text_similarity(list1, list2)
-                st.success("✅ Tarefa executada com sucesso!")
-                st.subheader("📋 Resultados")
-                st.json(result)
+                else:
+                    st.error("Envie os arquivos e informe as colunas para comparação")
+            elif workflow:
+                job_id = crew_manager.submit_workflow(
+                    selected_crew,
+                    model=model,
+                    llm_settings=llm_settings,
+                    user_id=user_id,
+                )
             else:
-                st.error("Envie os arquivos e informe as colunas para comparação")
-        elif workflow:
-            steps = crew_manager.workflows.get(workflow, [])
-            progress = st.progress(0)
-            outputs = []
-            for i, step in enumerate(steps):
-                with st.spinner(f"{step}..."):
-                    result = crew_manager.execute_crew_task(selected_crew, step)
-                    outputs.append(result)
-                progress.progress((i + 1) / len(steps))
-            st.success("✅ Workflow executado")
-            for step, out in zip(steps, outputs):
-                st.write(f"**{step}:** {out}")
-        else:
-            if task_description:
-                with st.spinner(f"Executando tarefa com a '{selected_crew}'..."):
-                    result = crew_manager.execute_crew_task(
-                        selected_crew, task_description
+                if task_description:
+                    job_id = crew_manager.submit_crew_task(
+                        selected_crew,
+                        task_description,
+                        model=model,
+                        llm_settings=llm_settings,
+                        user_id=user_id,
                     )
-                st.success("✅ Tarefa executada com sucesso!")
-                st.subheader("📋 Resultados")
-                st.text_area("Resultado da Execução", value=result, height=300)
-            else:
-                st.error("Por favor, descreva a tarefa a ser executada")
+                else:
+                    st.error("Por favor, descreva a tarefa a ser executada")
+        except AdmissionRejected as e:
+            st.warning(f"⏳ {e}. Tente novamente em {format_seconds(e.retry_after)}.")
 
-    st.markdown("---")
+        if job_id:
+            st.success(f"✅ Tarefa enfileirada (job {job_id[:8]})")
 
-    # Histórico de execuções
+
+@timed_fragment("Histórico", run_every=3)
+def show_job_history():
+    """Histórico dos jobs enviados aos workers"""
     st.subheader("📜 Histórico de Execuções")
+    st.button("🔄 Atualizar", key="refresh_jobs")
+
+    crew_manager = st.session_state.crew_manager
+    status_icons = {"queued": "⚪", "running": "🟡", "done": "🟢", "failed": "🔴"}
+    for job in crew_manager.job_queue.list_jobs(limit=20):
+        description = job["payload"].get("task") or job["kind"]
+        elapsed = ""
+        if job["started_at"]:
+            end_time = job["finished_at"] or time.time()
+            elapsed = f" ({end_time - job['started_at']:.1f}s)"
+        if job["status"] != "done" and job["progress"]:
+            show_job_progress(job)
+        with st.expander(
+            f"{status_icons.get(job['status'], '⚪')} **{description}** "
+            f"- {job['crew']}{elapsed}"
+        ):
+            st.caption(
+                f"Job {job['id'][:8]} · tentativas: {job['attempts']} · "
+                f"usuário: {job['user_id'] or '-'} · lane: {job['lane']}"
+            )
+            if job["error"]:
+                st.error(job["error"])
+            if job["status"] == "done":
+                show_job_result(job)
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    """Formata uma duração em segundos como '1h 02m 03s'"""
+    if seconds is None:
+        return "?"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {secs:02d}s"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+
+def show_job_progress(job):
+    """Barra de progresso de um job em lotes (linhas/s e tempo restante)"""
+    progress = job["progress"]
+    stages = {"index": "Indexando", "match": "Comparando", "done": "Concluído"}
+    stage = stages.get(progress["stage"], progress["stage"])
+    total = progress["rows_total"]
+    done = progress["rows_done"]
+    fraction = min(done / total, 1.0) if total else 0.0
+    text = f"{job['crew']} · {stage}: {done}"
+    if total:
+        text += f"/{total}"
+    text += (
+        f" linhas · {progress['rows_per_second']:.0f} linhas/s"
+        f" · restante: {format_seconds(progress['eta_seconds'])}"
+    )
+    if job["status"] == "queued":
+        text += " · aguardando retomada"
+    st.progress(fraction, text=text)
+
+
+def show_job_result(job):
+    """Exibe o resultado de um job concluído"""
+    result = job["result"]
+    if job["kind"] == "planilhas":
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Linhas comparadas", f"{result['rows']}")
+        col2.metric("Linhas/s", f"{result['rows_per_second']:.0f}")
+        col3.metric("Tempo", format_seconds(result["elapsed_seconds"]))
+        if result["resumed_from_row"]:
+            st.caption(f"Retomado a partir da linha {result['resumed_from_row']}")
+        st.dataframe(result["preview"], use_container_width=True)
+        st.caption(f"Resultado completo: `{result['output_file']}`")
+    elif job["kind"] == "workflow":
+        for step, out in zip(result["steps"], result["outputs"]):
+            st.write(f"**{step}:** {out}")
+        show_token_usage(result["token_usage"])
+    else:
+        st.text_area(
+            "Resultado da Execução",
+            value=result["output"],
+            height=300,
+            key=f"res_{job['id']}",
+        )
+        show_token_usage(result["token_usage"])
+
 
-    executions = [
-        {
-            "task": "Pesquisar sobre IA",
-            "crew": "Crew de Pesquisa",
-            "status": "Concluída",
-            "time": "2.3s",
-        },
-        {
-            "task": "Criar relatório",
-            "crew": "Crew de Conteúdo",
-            "status": "Concluída",
-            "time": "1.8s",
-        },
-        {
-            "task": "Analisar dados",
-            "crew": "Crew de Pesquisa",
-            "status": "Em andamento",
-            "time": "5.2s",
-        },
-    ]
-
-    for execution in executions:
-        status_color = "🟢" if execution["status"] == "Concluída" else "🟡"
-        st.write(
-            f"{status_color} **{execution['task']}** - {execution['crew']} ({execution['time']})"
+def show_token_usage(usage):
+    """Uso de tokens por etapa, com o arquivo do prompt que o gerou"""
+    for entry in usage:
+        text = (
+            f"🔢 {entry['step']}: prompt {entry['prompt_tokens']} tokens "
+            f"(contexto {entry['context_tokens']}), "
+            f"saída {entry['output_tokens']} tokens"
         )
+        if entry.get("prompt_file"):
+            text += f" · prompt em `{entry['prompt_file']}`"
+        st.caption(text)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,309 @@
+"""
+Controle de admissão e escalonamento justo das execuções de crews
+"""
+
+import math
+import sqlite3
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.job_queue import JobQueue
+
+LANES = ["interactive", "batch"]
+
+
+class AdmissionRejected(Exception):
+    """Job recusado por excesso de fila; retry_after indica quando tentar de novo"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Converte 'ana:2,bruno:1' em {'ana': 2.0, 'bruno': 1.0}"""
+    weights = {}
+    for item in spec.split(","):
+        if ":" not in item:
+            continue
+        user, weight = item.split(":", 1)
+        weights[user.strip()] = float(weight)
+    return weights
+
+
+class AdmissionController:
+    """Admite jobs na fila e escolhe qual job cada worker executa
+
+    - Recusa novos jobs quando a lane ou o usuário têm fila demais, sugerindo
+      um tempo de espera (retry-after).
+    - Limita jobs simultâneos por usuário e por crew.
+    - Tarefas interativas passam na frente dos workflows em lote; jobs em lote
+      esperando há mais de ``batch_aging_seconds`` sobem de prioridade.
+    - Entre usuários, usa fair queueing ponderado (start-time fair queueing):
+      cada job consome ``custo / peso`` do tempo virtual do usuário, e o usuário
+      com menor tempo virtual é atendido primeiro.
+    """
+
+    def __init__(
+        self,
+        job_queue: JobQueue,
+        max_running_per_user: int = 2,
+        max_running_per_crew: int = 1,
+        max_queue_depth: int = 50,
+        max_queued_per_user: int = 10,
+        batch_aging_seconds: float = 300.0,
+        tenant_weights: Optional[Dict[str, float]] = None,
+        default_service_seconds: float = 30.0,
+    ):
+        self.job_queue = job_queue
+        self.max_running_per_user = max_running_per_user
+        self.max_running_per_crew = max_running_per_crew
+        self.max_queue_depth = max_queue_depth
+        self.max_queued_per_user = max_queued_per_user
+        self.batch_aging_seconds = batch_aging_seconds
+        self.tenant_weights = tenant_weights or {}
+        self.default_service_seconds = default_service_seconds
+        self._initialize_db()
+
+    @classmethod
+    def from_config(cls, job_queue: JobQueue, config) -> "AdmissionController":
+        """Cria o controlador a partir de um objeto Config"""
+        return cls(
+            job_queue,
+            max_running_per_user=config.admission_max_running_per_user,
+            max_running_per_crew=config.admission_max_running_per_crew,
+            max_queue_depth=config.admission_max_queue_depth,
+            max_queued_per_user=config.admission_max_queued_per_user,
+            batch_aging_seconds=config.admission_batch_aging_seconds,
+            tenant_weights=parse_weights(config.admission_tenant_weights),
+        )
+
+    def _initialize_db(self):
+        """Cria as tabelas do escalonador no banco da fila"""
+        with self.job_queue.transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tenants (
+                    user_id TEXT PRIMARY KEY,
+                    virtual_time REAL NOT NULL DEFAULT 0,
+                    served REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scheduler_state (
+                    key TEXT PRIMARY KEY,
+                    value REAL NOT NULL
+                )
+                """
+            )
+
+    @staticmethod
+    def lane_for(kind: str) -> str:
+        """Tarefas avulsas são interativas; workflows e planilhas vão em lote"""
+        return "interactive" if kind == "task" else "batch"
+
+    def weight(self, user_id: str) -> float:
+        """Peso do usuário no fair queueing (padrão 1)"""
+        return max(self.tenant_weights.get(user_id, 1.0), 0.01)
+
+    def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        crew: Optional[str] = None,
+        user_id: str = "default",
+        cost: float = 1.0,
+    ) -> str:
+        """Admite o job (ou lança AdmissionRejected) e o coloca na fila"""
+        lane = self.lane_for(kind)
+        # A estimativa de espera é lida antes; a contagem e a inserção ficam na
+        # mesma transação, para sessões simultâneas não passarem do limite
+        service, workers = self.service_estimate(lane)
+        return self.job_queue.enqueue(
+            kind,
+            payload,
+            crew=crew,
+            user_id=user_id,
+            lane=lane,
+            cost=cost,
+            admit=lambda conn: self.admit(conn, user_id, lane, service, workers),
+        )
+
+    def service_estimate(self, lane: str) -> Tuple[float, int]:
+        """Latência média recente da lane e número de workers ativos"""
+        latency = self.job_queue.lane_stats().get(lane, {}).get("latency_avg")
+        workers = max(len(self.job_queue.list_workers()), 1)
+        return latency or self.default_service_seconds, workers
+
+    def admit(
+        self,
+        conn: sqlite3.Connection,
+        user_id: str,
+        lane: str,
+        service: float,
+        workers: int,
+    ) -> None:
+        """Verifica a profundidade da fila da lane e do usuário"""
+        lane_depth = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND lane = ?",
+            (lane,),
+        ).fetchone()[0]
+        user_depth = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND user_id = ?",
+            (user_id,),
+        ).fetchone()[0]
+
+        if lane_depth >= self.max_queue_depth:
+            raise AdmissionRejected(
+                f"Fila {lane} cheia ({lane_depth} jobs aguardando)",
+                self.retry_after(
+                    lane_depth - self.max_queue_depth + 1, service, workers
+                ),
+            )
+        if user_depth >= self.max_queued_per_user:
+            # O usuário não usa mais workers do que o seu limite de execução
+            raise AdmissionRejected(
+                f"Usuário {user_id} já tem {user_depth} jobs aguardando",
+                self.retry_after(
+                    user_depth - self.max_queued_per_user + 1,
+                    service,
+                    min(workers, self.max_running_per_user),
+                ),
+            )
+
+    @staticmethod
+    def retry_after(excess: int, service: float, workers: int) -> int:
+        """Segundos estimados até ``excess`` jobs da fila começarem a executar"""
+        return max(1, math.ceil(max(excess, 1) * service / max(workers, 1)))
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Reserva para o worker o próximo job segundo a política de admissão"""
+        return self.job_queue.claim(worker_id, chooser=self._choose)
+
+    def _choose(self, conn: sqlite3.Connection, now: float) -> Optional[str]:
+        """Escolhe o job: limites de concorrência, lane e fair queueing"""
+        candidates = conn.execute(
+            """
+            SELECT id, user_id, crew, lane, cost, created_at FROM jobs
+            WHERE status IN ('queued', 'running') AND visible_at <= ?
+            ORDER BY created_at
+            """,
+            (now,),
+        ).fetchall()
+        if not candidates:
+            return None
+
+        running_users: Counter = Counter()
+        running_crews: Counter = Counter()
+        # Só leases vivos contam; jobs com lease expirado estão entre os candidatos
+        for row in conn.execute(
+            """
+            SELECT user_id, crew FROM jobs
+            WHERE status = 'running' AND visible_at > ?
+            """,
+            (now,),
+        ):
+            running_users[row["user_id"]] += 1
+            running_crews[row["crew"]] += 1
+
+        eligible = [
+            job
+            for job in candidates
+            if running_users[job["user_id"]] < self.max_running_per_user
+            and (
+                job["crew"] is None
+                or running_crews[job["crew"]] < self.max_running_per_crew
+            )
+        ]
+        if not eligible:
+            return None
+
+        def priority(job: sqlite3.Row) -> int:
+            aged = now - job["created_at"] >= self.batch_aging_seconds
+            return 0 if job["lane"] == "interactive" or aged else 1
+
+        best = min(priority(job) for job in eligible)
+        eligible = [job for job in eligible if priority(job) == best]
+
+        clock_row = conn.execute(
+            "SELECT value FROM scheduler_state WHERE key = 'virtual_clock'"
+        ).fetchone()
+        clock = clock_row["value"] if clock_row else 0.0
+        virtual_times = {
+            row["user_id"]: row["virtual_time"]
+            for row in conn.execute("SELECT user_id, virtual_time FROM tenants")
+        }
+
+        def start_tag(job: sqlite3.Row) -> float:
+            # Usuários que ficaram ociosos não acumulam crédito
+            return max(virtual_times.get(job["user_id"], clock), clock)
+
+        job = min(eligible, key=lambda job: (start_tag(job), job["created_at"]))
+        start = start_tag(job)
+        conn.execute(
+            """
+            INSERT INTO tenants (user_id, virtual_time, served) VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                virtual_time = excluded.virtual_time,
+                served = served + excluded.served
+            """,
+            (
+                job["user_id"],
+                start + job["cost"] / self.weight(job["user_id"] or ""),
+                job["cost"],
+            ),
+        )
+        conn.execute(
+            """
+            INSERT INTO scheduler_state (key, value) VALUES ('virtual_clock', ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            """,
+            (start,),
+        )
+        return job["id"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Filas, espera e latência por lane, e uso por usuário"""
+        lanes = self.job_queue.lane_stats()
+        with self.job_queue.read() as conn:
+            rows = conn.execute(
+                """
+                SELECT user_id,
+                    SUM(status = 'queued') AS queued,
+                    SUM(status = 'running') AS running
+                FROM jobs WHERE status IN ('queued', 'running')
+                GROUP BY user_id
+                """
+            ).fetchall()
+            served = {
+                row["user_id"]: row["served"]
+                for row in conn.execute("SELECT user_id, served FROM tenants")
+            }
+        tenants: List[Dict[str, Any]] = [
+            {
+                "user_id": row["user_id"],
+                "queued": row["queued"],
+                "running": row["running"],
+                "served": served.get(row["user_id"], 0.0),
+                "weight": self.weight(row["user_id"] or ""),
+            }
+            for row in rows
+        ]
+        return {
+            "lanes": {lane: lanes.get(lane, _empty_lane()) for lane in LANES},
+            "tenants": tenants,
+        }
+
+
+def _empty_lane() -> Dict[str, Any]:
+    return {
+        "queued": 0,
+        "oldest_wait": 0.0,
+        "completed": 0,
+        "wait_avg": 0.0,
+        "wait_p95": 0.0,
+        "latency_avg": 0.0,
+        "latency_p95": 0.0,
+    }
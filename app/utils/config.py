@@ -12,7 +12,8 @@ class Config:
     """Classe para gerenciar configurações do sistema"""
 
     def __init__(self):
-        env_path = Path(__file__).resolve().parents[2] / ".env"
+        project_root = Path(__file__).resolve().parents[2]
+        env_path = project_root / ".env"
         load_dotenv(dotenv_path=env_path)
 
         # API Keys
@@ -23,6 +24,15 @@ class Config:
         self.default_model = os.getenv("DEFAULT_MODEL", "gpt-4")
         self.default_temperature = float(os.getenv("DEFAULT_TEMPERATURE", "0.7"))
 
+        # LLM Hedging Configuration
+        self.llm_hedge_enabled = (
+            os.getenv("LLM_HEDGE_ENABLED", "False").lower() == "true"
+        )
+        self.llm_fallback_model = os.getenv("LLM_FALLBACK_MODEL", "")
+        self.llm_hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+        self.llm_hedge_min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.llm_hedge_initial_delay = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "10"))
+
         # Application Configuration
         self.debug = os.getenv("DEBUG", "True").lower() == "true"
         self.log_level = os.getenv("LOG_LEVEL", "INFO")
@@ -31,6 +41,72 @@ class Config:
         self.streamlit_port = int(os.getenv("STREAMLIT_SERVER_PORT", "8501"))
         self.streamlit_address = os.getenv("STREAMLIT_SERVER_ADDRESS", "localhost")
 
+        # Data Storage
+        self.data_dir = Path(os.getenv("DATA_DIR", str(project_root / "data")))
+
+        # Memory Configuration
+        self.memory_db_path = os.getenv(
+            "MEMORY_DB_PATH", str(self.data_dir / "memory.db")
+        )
+        self.memory_max_items = int(os.getenv("MEMORY_MAX_ITEMS", "500"))
+        self.memory_ttl_seconds = float(os.getenv("MEMORY_TTL_SECONDS", "604800"))
+        self.memory_batch_size = int(os.getenv("MEMORY_BATCH_SIZE", "16"))
+        self.memory_top_k = int(os.getenv("MEMORY_TOP_K", "3"))
+        self.memory_embedder = os.getenv("MEMORY_EMBEDDER", "hashing")
+
+        # Context Budget Configuration
+        self.context_max_tokens = int(os.getenv("CONTEXT_MAX_TOKENS", "2000"))
+        self.context_summarize = (
+            os.getenv("CONTEXT_SUMMARIZE", "False").lower() == "true"
+        )
+        self.results_dir = os.getenv("RESULTS_DIR", str(self.data_dir / "results"))
+        self.results_max_files = int(os.getenv("RESULTS_MAX_FILES", "200"))
+
+        # Snapshot Configuration
+        self.snapshot_db_path = os.getenv(
+            "SNAPSHOT_DB_PATH", str(self.data_dir / "snapshots.db")
+        )
+        self.snapshot_keep_versions = int(os.getenv("SNAPSHOT_KEEP_VERSIONS", "5"))
+        self.snapshot_compact_threshold = int(
+            os.getenv("SNAPSHOT_COMPACT_THRESHOLD", "500")
+        )
+
+        # Job Queue Configuration
+        self.queue_db_path = os.getenv("QUEUE_DB_PATH", str(self.data_dir / "jobs.db"))
+        self.queue_visibility_timeout = float(
+            os.getenv("QUEUE_VISIBILITY_TIMEOUT", "60")
+        )
+        self.queue_max_attempts = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+        self.worker_processes = int(os.getenv("WORKER_PROCESSES", "0"))
+
+        # Admission Control Configuration
+        self.admission_max_running_per_user = int(
+            os.getenv("ADMISSION_MAX_RUNNING_PER_USER", "2")
+        )
+        self.admission_max_running_per_crew = int(
+            os.getenv("ADMISSION_MAX_RUNNING_PER_CREW", "1")
+        )
+        self.admission_max_queue_depth = int(
+            os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "50")
+        )
+        self.admission_max_queued_per_user = int(
+            os.getenv("ADMISSION_MAX_QUEUED_PER_USER", "10")
+        )
+        self.admission_batch_aging_seconds = float(
+            os.getenv("ADMISSION_BATCH_AGING_SECONDS", "300")
+        )
+        self.admission_tenant_weights = os.getenv("ADMISSION_TENANT_WEIGHTS", "")
+
+        # Planilhas Pipeline Configuration
+        self.planilhas_batch_size = int(os.getenv("PLANILHAS_BATCH_SIZE", "500"))
+        self.planilhas_dir = os.getenv(
+            "PLANILHAS_DIR", str(self.data_dir / "planilhas")
+        )
+
+        # Tool Execution Configuration
+        self.tool_cache_size = int(os.getenv("TOOL_CACHE_SIZE", "256"))
+        self.tool_timeout = float(os.getenv("TOOL_TIMEOUT", "60"))
+
     def is_api_configured(self) -> bool:
         """Verifica se as APIs estão configuradas"""
         return bool(
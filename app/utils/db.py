@@ -0,0 +1,47 @@
+"""
+Conexões SQLite compartilhadas pelos armazenamentos locais
+"""
+
+import sqlite3
+from contextlib import closing, contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def transaction(db_path: str, timeout: float = 30) -> Iterator[sqlite3.Connection]:
+    """Conexão com uma transação BEGIN IMMEDIATE, confirmada ao sair do bloco
+
+    A trava de escrita é obtida no início, então processos concorrentes esperam
+    (até ``timeout`` segundos) em vez de falhar no meio da transação. Qualquer
+    exceção desfaz a transação. A conexão é sempre fechada.
+    """
+    conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+@contextmanager
+def read_only(db_path: str, timeout: float = 30) -> Iterator[sqlite3.Connection]:
+    """Conexão para consultas (só SELECT), sem pegar a trava de escrita
+
+    Em modo WAL, as leituras não esperam nem bloqueiam quem está gravando.
+    """
+    with closing(sqlite3.connect(db_path, timeout=timeout)) as conn:
+        conn.row_factory = sqlite3.Row
+        yield conn
+
+
+def enable_wal(db_path: str) -> None:
+    """Ativa o modo WAL (leituras não bloqueiam a escrita de outro processo)"""
+    # Fora de transação: o SQLite não troca o journal_mode dentro de uma
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
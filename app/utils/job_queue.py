@@ -0,0 +1,379 @@
+"""
+Fila local e durável (SQLite) de jobs de crews e workflows
+"""
+
+import json
+import math
+import os
+import sqlite3
+import time
+import uuid
+from typing import Any, Callable, ContextManager, Dict, List, Optional
+
+from app.utils.db import enable_wal, read_only, transaction
+
+JOB_STATUSES = ["queued", "running", "done", "failed"]
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """Percentil de uma lista já ordenada (0 se vazia)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(math.ceil(len(values) * percentile) - 1, 0))
+    return values[index]
+
+
+class JobQueue:
+    """Fila de jobs com lease por visibilidade, heartbeats e novas tentativas"""
+
+    def __init__(
+        self,
+        db_path: str,
+        visibility_timeout: float = 60.0,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+    ):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._initialize_db()
+
+    @classmethod
+    def from_config(cls, config) -> "JobQueue":
+        """Cria a fila a partir de um objeto Config"""
+        return cls(
+            db_path=config.queue_db_path,
+            visibility_timeout=config.queue_visibility_timeout,
+            max_attempts=config.queue_max_attempts,
+        )
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        """Transação no banco da fila"""
+        return transaction(self.db_path)
+
+    def transaction(self) -> ContextManager[sqlite3.Connection]:
+        """Transação no banco da fila, para tabelas e políticas de outros módulos"""
+        return self._connect()
+
+    def _read(self) -> ContextManager[sqlite3.Connection]:
+        """Conexão só de leitura no banco da fila"""
+        return read_only(self.db_path)
+
+    def read(self) -> ContextManager[sqlite3.Connection]:
+        """Conexão só de leitura, para consultas de outros módulos"""
+        return self._read()
+
+    def _initialize_db(self):
+        """Cria as tabelas de jobs e de workers"""
+        enable_wal(self.db_path)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    crew TEXT,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    worker_id TEXT,
+                    visible_at REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    progress TEXT,
+                    user_id TEXT,
+                    lane TEXT NOT NULL DEFAULT 'default',
+                    cost REAL NOT NULL DEFAULT 1
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status_visible "
+                "ON jobs (status, visible_at)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS workers (
+                    id TEXT PRIMARY KEY,
+                    pid INTEGER,
+                    current_job TEXT,
+                    processed INTEGER NOT NULL DEFAULT 0,
+                    heartbeat_at REAL NOT NULL,
+                    stats TEXT
+                )
+                """
+            )
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        crew: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        user_id: Optional[str] = None,
+        lane: str = "default",
+        cost: float = 1.0,
+        admit: Optional[Callable[[sqlite3.Connection], None]] = None,
+    ) -> str:
+        """Adiciona um job à fila e retorna seu id
+
+        ``admit`` roda na mesma transação, antes da inserção; se lançar uma
+        exceção o job não é enfileirado.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            if admit is not None:
+                admit(conn)
+            conn.execute(
+                """
+                INSERT INTO jobs
+                    (id, kind, crew, payload, status, max_attempts,
+                     visible_at, created_at, user_id, lane, cost)
+                VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job_id,
+                    kind,
+                    crew,
+                    json.dumps(payload),
+                    max_attempts or self.max_attempts,
+                    now,
+                    now,
+                    user_id,
+                    lane,
+                    cost,
+                ),
+            )
+        return job_id
+
+    def claim(
+        self,
+        worker_id: str,
+        chooser: Optional[Callable[[sqlite3.Connection, float], Optional[str]]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Reserva o próximo job visível (novo ou com lease expirado)
+
+        Por padrão o job mais antigo é escolhido; ``chooser`` permite outra
+        política, recebendo a conexão (dentro da transação) e o horário atual.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            # Jobs de workers que morreram sem novas tentativas disponíveis
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', finished_at = ?,
+                    error = COALESCE(error, 'Lease expirado sem novas tentativas')
+                WHERE status = 'running' AND visible_at <= ?
+                    AND attempts >= max_attempts
+                """,
+                (now, now),
+            )
+            if chooser is not None:
+                job_id = chooser(conn, now)
+            else:
+                row = conn.execute(
+                    """
+                    SELECT id FROM jobs
+                    WHERE status IN ('queued', 'running') AND visible_at <= ?
+                    ORDER BY created_at LIMIT 1
+                    """,
+                    (now,),
+                ).fetchone()
+                job_id = row["id"] if row is not None else None
+            if job_id is None:
+                return None
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'running', worker_id = ?,
+                    attempts = attempts + 1, visible_at = ?, started_at = ?
+                WHERE id = ?
+                """,
+                (worker_id, now + self.visibility_timeout, now, job_id),
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            return self._to_dict(job.fetchone())
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Renova o lease do job; retorna False se o worker o perdeu"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET visible_at = ?
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+                """,
+                (time.time() + self.visibility_timeout, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        """Registra o progresso de um job em execução"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ? WHERE id = ?",
+                (json.dumps(progress), job_id),
+            )
+
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        """Marca o job como concluído com o resultado"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = 'done', result = ?, error = NULL,
+                    finished_at = ?
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+                """,
+                (json.dumps(result, default=str), time.time(), job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Registra a falha; o job volta à fila enquanto houver tentativas"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET error = ?,
+                    status = CASE WHEN attempts < max_attempts
+                        THEN 'queued' ELSE 'failed' END,
+                    visible_at = ? + ? * attempts,
+                    finished_at = CASE WHEN attempts < max_attempts
+                        THEN NULL ELSE ? END
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+                """,
+                (error, now, self.retry_delay, now, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna um job pelo id"""
+        with self._read() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            return self._to_dict(row.fetchone())
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Lista os jobs mais recentes"""
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Quantidade de jobs por status"""
+        counts = {status: 0 for status in JOB_STATUSES}
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        counts.update({row[0]: row[1] for row in rows})
+        return counts
+
+    def lane_stats(self, window: int = 200) -> Dict[str, Dict[str, Any]]:
+        """Espera na fila e latência de execução por lane (últimos jobs)"""
+        with self._read() as conn:
+            finished = conn.execute(
+                """
+                SELECT lane, started_at - created_at AS wait,
+                    finished_at - started_at AS latency
+                FROM jobs
+                WHERE status = 'done' AND started_at IS NOT NULL
+                ORDER BY finished_at DESC LIMIT ?
+                """,
+                (window,),
+            ).fetchall()
+            queued = conn.execute(
+                """
+                SELECT lane, COUNT(*) AS queued, MIN(created_at) AS oldest
+                FROM jobs WHERE status = 'queued' GROUP BY lane
+                """
+            ).fetchall()
+
+        lanes: Dict[str, Dict[str, Any]] = {}
+
+        def lane(name: str) -> Dict[str, Any]:
+            return lanes.setdefault(
+                name, {"queued": 0, "oldest_wait": 0.0, "waits": [], "latencies": []}
+            )
+
+        for row in finished:
+            lane(row["lane"])["waits"].append(row["wait"])
+            lane(row["lane"])["latencies"].append(row["latency"])
+        now = time.time()
+        for row in queued:
+            lane(row["lane"]).update(
+                queued=row["queued"], oldest_wait=now - row["oldest"]
+            )
+
+        for values in lanes.values():
+            waits = sorted(values.pop("waits"))
+            latencies = sorted(values.pop("latencies"))
+            values["completed"] = len(latencies)
+            values["wait_avg"] = sum(waits) / len(waits) if waits else 0.0
+            values["wait_p95"] = _percentile(waits, 0.95)
+            values["latency_avg"] = (
+                sum(latencies) / len(latencies) if latencies else 0.0
+            )
+            values["latency_p95"] = _percentile(latencies, 0.95)
+        return lanes
+
+    def register_worker(
+        self,
+        worker_id: str,
+        current_job: Optional[str] = None,
+        processed: int = 0,
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Registra o heartbeat de um processo worker e suas métricas"""
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO workers
+                    (id, pid, current_job, processed, heartbeat_at, stats)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET pid = excluded.pid,
+                    current_job = excluded.current_job,
+                    processed = excluded.processed,
+                    heartbeat_at = excluded.heartbeat_at,
+                    stats = excluded.stats
+                """,
+                (
+                    worker_id,
+                    os.getpid(),
+                    current_job,
+                    processed,
+                    time.time(),
+                    json.dumps(stats or {}),
+                ),
+            )
+
+    def list_workers(self, max_age: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Lista workers com heartbeat recente"""
+        max_age = max_age or self.visibility_timeout
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT * FROM workers WHERE heartbeat_at >= ? ORDER BY id",
+                (time.time() - max_age,),
+            ).fetchall()
+        workers = [dict(row) for row in rows]
+        for worker in workers:
+            worker["stats"] = json.loads(worker["stats"]) if worker["stats"] else {}
+        return workers
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["progress"] = json.loads(job["progress"]) if job["progress"] else None
+        return job
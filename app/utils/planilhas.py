@@ -0,0 +1,237 @@
+"""
+Pipeline em lotes e retomável para a comparação de planilhas
+"""
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+from thefuzz import fuzz, process, utils
+
+CSV_HEADER = ["linha", "texto", "correspondencia", "pontuacao"]
+
+
+def _cell_to_str(value: Any) -> str:
+    """Converte a célula como em read_excel_column (vazias viram 'nan')"""
+    return "nan" if value is None else str(value)
+
+
+def iter_excel_column(
+    file_path: str, column_name: str, start: int = 0
+) -> Iterator[str]:
+    """Lê uma coluna do Excel linha a linha, sem carregar a planilha inteira"""
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell) if cell is not None else "" for cell in next(rows, ())]
+        if column_name not in header:
+            raise ValueError(f"Coluna {column_name} não encontrada")
+        index = header.index(column_name)
+
+        position = 0
+        pending_empty = 0
+        for row in rows:
+            if all(cell is None for cell in row):
+                # Linhas vazias no fim do arquivo são ignoradas, como no pandas
+                pending_empty += 1
+                continue
+            values = ["nan"] * pending_empty + [
+                _cell_to_str(row[index] if index < len(row) else None)
+            ]
+            pending_empty = 0
+            for value in values:
+                if position >= start:
+                    yield value
+                position += 1
+    finally:
+        workbook.close()
+
+
+def count_excel_rows(file_path: str) -> Optional[int]:
+    """Número estimado de linhas de dados (pela dimensão salva na planilha)"""
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        max_row = workbook.active.max_row
+        return max(max_row - 1, 0) if max_row else None
+    finally:
+        workbook.close()
+
+
+def normalize_text(text: str) -> str:
+    """Mesma normalização do token_sort_ratio: ASCII, minúsculas e tokens ordenados"""
+    return " ".join(sorted(utils.full_process(text, force_ascii=True).split()))
+
+
+class CandidateIndex:
+    """Textos de comparação pré-normalizados (e sem duplicatas) para o match"""
+
+    def __init__(self, texts: List[str]):
+        self.texts: List[str] = []
+        self.keys: Dict[int, str] = {}
+        seen = set()
+        for text in texts:
+            key = normalize_text(text)
+            # A primeira ocorrência vence em caso de empate, como no extractOne
+            if key in seen:
+                continue
+            seen.add(key)
+            self.keys[len(self.texts)] = key
+            self.texts.append(text)
+
+    def match(self, text: str) -> Tuple[Optional[str], int]:
+        """Texto mais similar e a pontuação (equivalente a token_sort_ratio)"""
+        result = process.extractOne(
+            normalize_text(text), self.keys, processor=None, scorer=fuzz.ratio
+        )
+        if result is None:
+            return None, 0
+        _, score, position = result
+        return self.texts[position], score
+
+
+class PlanilhasPipeline:
+    """Compara duas colunas em lotes: ler → normalizar → indexar → comparar → gravar
+
+    Os textos da primeira planilha são processados em lotes de ``batch_size``
+    linhas. Cada lote concluído é gravado em CSV e registrado em um checkpoint,
+    de modo que uma execução interrompida continua do último lote salvo. Ao
+    final, o CSV vai para ``work_dir/resultados`` e o checkpoint é apagado.
+    """
+
+    def __init__(
+        self,
+        file1: str,
+        column1: str,
+        file2: str,
+        column2: str,
+        work_dir: str,
+        batch_size: int = 500,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        preview_size: int = 20,
+    ):
+        self.file1 = file1
+        self.column1 = column1
+        self.file2 = file2
+        self.column2 = column2
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.preview_size = preview_size
+        key = self.checkpoint_key()
+        self.checkpoint_dir = Path(work_dir) / key
+        self.output_path = self.checkpoint_dir / "matches.csv"
+        self.state_path = self.checkpoint_dir / "state.json"
+        self.result_path = Path(work_dir) / "resultados" / f"{key}.csv"
+
+    def checkpoint_key(self) -> str:
+        """Identifica a execução pelos arquivos, colunas e tamanho do lote"""
+        parts = []
+        for path, column in ((self.file1, self.column1), (self.file2, self.column2)):
+            stat = os.stat(path)
+            parts.append([os.path.abspath(path), stat.st_size, stat.st_mtime, column])
+        parts.append(self.batch_size)
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()[:16]
+
+    def load_state(self) -> Dict[str, Any]:
+        """Último checkpoint salvo (ou o estado inicial)"""
+        if self.state_path.exists():
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        return {"batches_done": 0, "rows_done": 0, "output_bytes": 0, "preview": []}
+
+    def cleanup(self) -> None:
+        """Apaga o checkpoint (CSV parcial e estado)"""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        """Grava o checkpoint de forma atômica"""
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    def _report(
+        self,
+        stage: str,
+        state: Dict[str, Any],
+        rows_total: Optional[int],
+        resumed_rows: int,
+        start: float,
+    ) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start
+        processed = state["rows_done"] - resumed_rows
+        rows_per_second = processed / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if rows_total is not None and rows_per_second > 0:
+            eta = max(rows_total - state["rows_done"], 0) / rows_per_second
+        progress = {
+            "stage": stage,
+            "rows_done": state["rows_done"],
+            "rows_total": rows_total,
+            "batches_done": state["batches_done"],
+            "rows_per_second": rows_per_second,
+            "eta_seconds": eta,
+        }
+        if self.on_progress:
+            self.on_progress(progress)
+        return progress
+
+    def run(self) -> Dict[str, Any]:
+        """Executa (ou retoma) a comparação e retorna o resumo"""
+        start = time.perf_counter()
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        state = self.load_state()
+        resumed_rows = state["rows_done"]
+        rows_total = count_excel_rows(self.file1)
+
+        # Indexar: a segunda planilha é lida e normalizada uma única vez
+        self._report("index", state, rows_total, resumed_rows, start)
+        index = CandidateIndex(list(iter_excel_column(self.file2, self.column2)))
+
+        # Descarta linhas gravadas depois do último checkpoint
+        with open(self.output_path, "a+", encoding="utf-8", newline="") as output:
+            output.truncate(state["output_bytes"])
+            writer = csv.writer(output)
+            if state["output_bytes"] == 0:
+                writer.writerow(CSV_HEADER)
+
+            texts = iter_excel_column(self.file1, self.column1, start=resumed_rows)
+            while True:
+                batch = list(islice(texts, self.batch_size))
+                if not batch:
+                    break
+                first_row = state["rows_done"]
+                for offset, text in enumerate(batch):
+                    match, score = index.match(text)
+                    writer.writerow([first_row + offset + 1, text, match, score])
+                    if len(state["preview"]) < self.preview_size:
+                        preview = dict(zip(CSV_HEADER[1:], (text, match, score)))
+                        state["preview"].append(preview)
+                output.flush()
+                os.fsync(output.fileno())
+
+                state["rows_done"] += len(batch)
+                state["batches_done"] += 1
+                state["output_bytes"] = output.tell()
+                self._save_state(state)
+                self._report("match", state, rows_total, resumed_rows, start)
+
+        # Concluído: o checkpoint não é mais necessário
+        self.result_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.output_path, self.result_path)
+        self.cleanup()
+
+        progress = self._report("done", state, state["rows_done"], resumed_rows, start)
+        return {
+            "output_file": str(self.result_path),
+            "rows": state["rows_done"],
+            "batches": state["batches_done"],
+            "resumed_from_row": resumed_rows,
+            "elapsed_seconds": time.perf_counter() - start,
+            "rows_per_second": progress["rows_per_second"],
+            "preview": state["preview"],
+        }
@@ -0,0 +1,129 @@
+"""
+View models memoizados e medição de tempo das seções da interface
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+
+class ViewModelCache:
+    """Guarda view models e só os recalcula quando a versão do estado muda"""
+
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, version: Hashable, builder: Callable[[], Any]) -> Any:
+        """Retorna o view model da versão informada, construindo-o se necessário"""
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = builder()
+        self._entries[name] = (version, value)
+        return value
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Descarta um view model (ou todos)"""
+        if name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(name, None)
+
+
+class RenderTimer:
+    """Tempo de execução de cada seção por rerun, para o overlay de desempenho"""
+
+    def __init__(self, history: int = 20):
+        # Reruns parciais (fragmentos) enchem o histórico sozinhos, por exemplo o
+        # histórico de jobs a cada 3 s; o último rerun completo fica à parte
+        self.runs: deque = deque(maxlen=history)
+        self.full_run: Optional[Dict] = None
+        self.current: Optional[Dict] = None
+
+    def start_run(self, scope: str = "app") -> None:
+        """Inicia a medição de um rerun (completo ou de um fragmento)"""
+        self.current = {
+            "scope": scope,
+            "started": time.perf_counter(),
+            "sections": {},
+            "total_ms": 0.0,
+        }
+
+    def end_run(self) -> Optional[Dict]:
+        """Finaliza o rerun atual e o adiciona ao histórico"""
+        run = self.current
+        if run is None:
+            return None
+        run["total_ms"] = (time.perf_counter() - run.pop("started")) * 1000
+        if run["scope"] == "app":
+            self.full_run = run
+        self.runs.append(run)
+        self.current = None
+        return run
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[Dict[str, float]]:
+        """Mede o tempo de uma seção; fora de um rerun, registra um rerun próprio"""
+        standalone = self.current is None
+        if standalone:
+            self.start_run(scope=name)
+        timing = {"ms": 0.0}
+        start = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing["ms"] = (time.perf_counter() - start) * 1000
+            self.current["sections"][name] = timing["ms"]
+            if standalone:
+                self.end_run()
+
+    def last_full_run(self) -> Optional[Dict]:
+        """Último rerun completo da aplicação"""
+        return self.full_run
+
+    def recent(self) -> List[Dict]:
+        """Reruns mais recentes primeiro"""
+        return list(reversed(self.runs))
+
+
+def build_agent_rows(agent_manager) -> List[Dict]:
+    """View model da lista de agentes"""
+    rows = []
+    for agent_type in agent_manager.list_available_agent_types():
+        info = agent_manager.get_agent_info(agent_type) or {}
+        rows.append(
+            {
+                "type": agent_type,
+                "name": info.get("name", agent_type),
+                "role": info.get("role", "-"),
+                "tools": ", ".join(agent_manager.get_agent_tools(agent_type)),
+                "created": agent_manager.get_agent(agent_type) is not None,
+            }
+        )
+    return rows
+
+
+def build_crew_rows(crew_manager, agent_manager) -> List[Dict]:
+    """View model da lista de crews, a partir das configurações salvas"""
+    rows = []
+    for name in crew_manager.list_crew_names():
+        info = crew_manager.get_crew_info(name) or {}
+        roles = [
+            (agent_manager.get_agent_info(agent_type) or {}).get("role", agent_type)
+            for agent_type in info.get("agent_types", [])
+        ]
+        rows.append(
+            {
+                "name": name,
+                "description": info.get("description", ""),
+                "agents": ", ".join(roles),
+                "workflow": info.get("workflow"),
+                "created_at": info.get("created_at"),
+            }
+        )
+    return rows
@@ -0,0 +1,163 @@
+"""
+Worker que executa jobs de crews e workflows retirados da fila local
+
+Uso:
+    python -m app.worker --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.config import Config
+from app.utils.job_queue import JobQueue
+
+JobHandler = Callable[[Dict[str, Any]], Any]
+
+
+def process_job(
+    queue: JobQueue, job: Dict[str, Any], handler: JobHandler, worker_id: str
+) -> bool:
+    """Executa um job renovando seu lease até terminar"""
+    stop = threading.Event()
+    interval = queue.visibility_timeout / 3
+
+    def beat():
+        while not stop.wait(interval):
+            if not queue.heartbeat(job["id"], worker_id):
+                print(f"[{worker_id}] Lease do job {job['id']} perdido")
+                return
+
+    heartbeat = threading.Thread(target=beat, daemon=True)
+    heartbeat.start()
+    try:
+        result = handler(job)
+    except Exception as e:
+        print(f"[{worker_id}] Erro no job {job['id']}: {e}")
+        queue.fail(job["id"], worker_id, f"{type(e).__name__}: {e}")
+        return False
+    finally:
+        stop.set()
+        heartbeat.join()
+    return queue.complete(job["id"], worker_id, result)
+
+
+def work(
+    queue: JobQueue,
+    handler: JobHandler,
+    worker_id: str,
+    poll_interval: float = 1.0,
+    max_jobs: Optional[int] = None,
+    stats: Optional[Callable[[], Dict[str, Any]]] = None,
+    claim: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+) -> int:
+    """Laço do worker: reserva, executa e confirma jobs da fila
+
+    ``claim`` substitui a reserva padrão (ex.: AdmissionController.claim).
+    As métricas de ``stats`` só são recalculadas ao iniciar e após cada job;
+    com a fila vazia, o heartbeat reaproveita os últimos valores.
+    """
+    claim = claim or queue.claim
+    processed = 0
+    worker_stats = stats() if stats else None
+
+    def register(current_job: Optional[str] = None):
+        queue.register_worker(worker_id, current_job, processed, worker_stats)
+
+    register()
+    while max_jobs is None or processed < max_jobs:
+        job = claim(worker_id)
+        if job is None:
+            register()
+            time.sleep(poll_interval)
+            continue
+        register(job["id"])
+        process_job(queue, job, handler, worker_id)
+        processed += 1
+        worker_stats = stats() if stats else None
+        register()
+    return processed
+
+
+def run_worker(poll_interval: float) -> None:
+    """Ponto de entrada de cada processo worker"""
+    from app.agents.agent_manager import AgentManager
+    from app.crews.crew_manager import CrewManager
+
+    config = Config()
+    queue = JobQueue.from_config(config)
+    crew_manager = CrewManager(AgentManager(), config=config)
+    agent_manager = crew_manager.agent_manager
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    print(f"[{worker_id}] Worker iniciado")
+    work(
+        queue,
+        crew_manager.run_job,
+        worker_id,
+        poll_interval,
+        stats=lambda: {
+            "llm": agent_manager.get_llm_stats(),
+            "tools": agent_manager.get_tool_stats(),
+            "memory": crew_manager.get_memory_stats(),
+        },
+        claim=crew_manager.admission.claim,
+    )
+
+
+def main(argv=None) -> None:
+    """Inicia e supervisiona N processos worker"""
+    config = Config()
+    parser = argparse.ArgumentParser(description="Workers de crews do APP_AGENTES")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.worker_processes or os.cpu_count() or 1,
+        help="Número de processos worker",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Intervalo (s) entre consultas à fila vazia",
+    )
+    args = parser.parse_args(argv)
+
+    # Garante o schema antes de iniciar os processos
+    JobQueue.from_config(config)
+
+    processes: Dict[int, multiprocessing.Process] = {}
+
+    def start(slot: int):
+        process = multiprocessing.Process(
+            target=run_worker, args=(args.poll_interval,), daemon=True
+        )
+        process.start()
+        processes[slot] = process
+
+    for slot in range(args.workers):
+        start(slot)
+    print(f"{args.workers} workers iniciados (fila: {config.queue_db_path})")
+
+    try:
+        while True:
+            # Processos que caíram são recriados; seus jobs voltam à fila
+            # quando o lease expira
+            for slot, process in list(processes.items()):
+                if not process.is_alive():
+                    print(f"Worker {process.pid} saiu ({process.exitcode})")
+                    start(slot)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Encerrando workers...")
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Fixtures compartilhadas pelos testes
+"""
+
+import pytest
+
+from app.agents.agent_manager import AgentManager
+from app.crews.crew_manager import CrewManager
+from app.crews.memory import MemoryStore
+from app.crews.snapshot import SnapshotStore
+from app.utils.config import Config
+from app.utils.job_queue import JobQueue
+
+
+@pytest.fixture
+def make_crew_manager(tmp_path, monkeypatch):
+    """Cria CrewManagers com bancos, DATA_DIR e RESULTS_DIR em tmp_path
+
+    Todas as chamadas usam os mesmos bancos, como processos diferentes do app.
+    """
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("RESULTS_DIR", str(tmp_path / "results"))
+
+    def make(snapshot_store=None):
+        config = Config()
+        return CrewManager(
+            AgentManager(config),
+            memory_store=MemoryStore(str(tmp_path / "memory.db")),
+            config=config,
+            job_queue=JobQueue(str(tmp_path / "jobs.db")),
+            snapshot_store=snapshot_store
+            or SnapshotStore(str(tmp_path / "snapshots.db")),
+        )
+
+    return make
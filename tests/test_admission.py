@@ -0,0 +1,158 @@
+"""
+Testes para o controle de admissão e o escalonamento justo da fila
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.utils.admission import AdmissionController, AdmissionRejected, parse_weights
+from app.utils.job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"), visibility_timeout=30)
+
+
+def make_controller(queue, **kwargs):
+    options = {
+        "max_running_per_user": 10,
+        "max_running_per_crew": 10,
+        "max_queue_depth": 100,
+        "max_queued_per_user": 100,
+    }
+    options.update(kwargs)
+    return AdmissionController(queue, **options)
+
+
+def drain(controller, worker_id="w1"):
+    """Executa todos os jobs um a um e retorna os usuários na ordem atendida"""
+    order = []
+    while True:
+        job = controller.claim(worker_id)
+        if job is None:
+            return order
+        order.append(job["user_id"])
+        controller.job_queue.complete(job["id"], worker_id, "ok")
+
+
+class TestAdmissionController:
+    """Testes para a classe AdmissionController"""
+
+    def test_fair_queueing_between_users(self, queue):
+        """Testa que um usuário com muitos jobs não monopoliza os workers"""
+        controller = make_controller(queue)
+        for i in range(6):
+            controller.submit("task", {"i": i}, user_id="ana")
+        for i in range(2):
+            controller.submit("task", {"i": i}, user_id="bruno")
+
+        assert drain(controller)[:4] == ["ana", "bruno", "ana", "bruno"]
+
+    def test_weights_and_costs(self, queue):
+        """Testa os pesos por usuário e o custo dos jobs"""
+        controller = make_controller(queue, tenant_weights=parse_weights("ana:2"))
+        for i in range(4):
+            controller.submit("task", {"i": i}, user_id="ana")
+            controller.submit("task", {"i": i}, user_id="bruno")
+
+        # Com peso 2, ana é atendida duas vezes para cada vez de bruno
+        assert drain(controller)[:6].count("ana") == 4
+
+        controller.submit("workflow", {}, user_id="ana", cost=3)
+        controller.submit("workflow", {}, user_id="bruno")
+        controller.submit("workflow", {}, user_id="bruno")
+        assert drain(controller) == ["ana", "bruno", "bruno"]
+
+    def test_concurrency_limits(self, queue):
+        """Testa os limites de jobs simultâneos por usuário e por crew"""
+        controller = make_controller(
+            queue, max_running_per_user=2, max_running_per_crew=1
+        )
+        controller.submit("task", {}, crew="A", user_id="ana")
+        controller.submit("task", {}, crew="A", user_id="ana")
+        controller.submit("task", {}, crew="B", user_id="ana")
+        controller.submit("task", {}, crew="C", user_id="ana")
+
+        first = controller.claim("w1")
+        second = controller.claim("w2")
+        assert (first["crew"], second["crew"]) == ("A", "B")
+        # Usuário no limite: nenhum outro job dele é reservado
+        assert controller.claim("w3") is None
+
+        queue.complete(first["id"], "w1", "ok")
+        assert controller.claim("w3")["crew"] == "A"
+
+    def test_interactive_lane_first_and_batch_aging(self, queue):
+        """Testa a prioridade das tarefas e o envelhecimento dos jobs em lote"""
+        controller = make_controller(queue, batch_aging_seconds=60)
+        batch_id = controller.submit("workflow", {}, user_id="ana")
+        task_id = controller.submit("task", {}, user_id="ana")
+        assert queue.get(batch_id)["lane"] == "batch"
+        assert queue.get(task_id)["lane"] == "interactive"
+        assert controller.claim("w1")["id"] == task_id
+
+        # Job em lote esperando além do limite disputa com as tarefas
+        new_task = controller.submit("task", {}, user_id="ana")
+        with queue.transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET created_at = ? WHERE id = ?",
+                (time.time() - 120, batch_id),
+            )
+        assert controller.claim("w2")["id"] == batch_id
+        assert controller.claim("w3")["id"] == new_task
+
+    def test_rejects_with_retry_after(self, queue):
+        """Testa a recusa por profundidade da fila com sugestão de espera"""
+        controller = make_controller(
+            queue, max_queue_depth=2, max_queued_per_user=3, default_service_seconds=10
+        )
+        controller.submit("task", {}, user_id="ana")
+        controller.submit("task", {}, user_id="bruno")
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.submit("task", {}, user_id="carla")
+        assert rejected.value.retry_after == 10
+
+        # A lane em lote tem sua própria fila
+        controller.submit("workflow", {}, user_id="ana")
+        controller.submit("workflow", {}, user_id="ana")
+        with pytest.raises(AdmissionRejected):
+            controller.submit("workflow", {}, user_id="ana")
+
+    def test_concurrent_submissions_respect_depth(self, queue):
+        """Testa que envios simultâneos não passam do limite da fila"""
+        controller = make_controller(queue, max_queue_depth=5)
+        rejected = []
+
+        def submit(i):
+            try:
+                controller.submit("task", {"i": i}, user_id=f"u{i}")
+            except AdmissionRejected:
+                rejected.append(i)
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert queue.stats()["queued"] == 5
+        assert len(rejected) == 15
+
+    def test_lane_stats(self, queue):
+        """Testa a espera e a latência por lane"""
+        controller = make_controller(queue)
+        controller.submit("task", {}, user_id="ana")
+        controller.submit("workflow", {}, user_id="ana")
+        job = controller.claim("w1")
+        queue.complete(job["id"], "w1", "ok")
+
+        stats = controller.get_stats()
+        assert stats["lanes"]["interactive"]["completed"] == 1
+        assert stats["lanes"]["interactive"]["queued"] == 0
+        assert stats["lanes"]["batch"]["queued"] == 1
+        assert stats["lanes"]["batch"]["completed"] == 0
+        assert stats["tenants"] == [
+            {"user_id": "ana", "queued": 1, "running": 0, "served": 1.0, "weight": 1.0}
+        ]
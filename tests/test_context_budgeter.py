@@ -0,0 +1,116 @@
+"""
+Testes para o ContextBudgeter
+"""
+
+import json
+import os
+
+from app.crews.context import ContextBudgeter, count_tokens, looks_tabular
+
+MODEL = "modelo-de-teste"
+
+
+class TestContextBudgeter:
+    """Testes para a classe ContextBudgeter"""
+
+    def test_short_outputs_are_kept(self):
+        """Testa que saídas pequenas passam sem alteração"""
+        budgeter = ContextBudgeter(max_tokens=500)
+        context, tokens = budgeter.build_context(
+            ["Ler planilhas"], ["2 planilhas lidas"], MODEL, prefix="crew"
+        )
+        assert context == "### Ler planilhas\n2 planilhas lidas"
+        assert tokens == count_tokens(context, MODEL)
+
+    def test_long_text_is_truncated_to_budget(self):
+        """Testa o corte de textos longos mantendo início e fim"""
+        budgeter = ContextBudgeter(max_tokens=100)
+        text = "início " + "palavra " * 2000 + "fim"
+        context, tokens = budgeter.build_context(
+            ["Comparar colunas"], [text], MODEL, prefix="crew"
+        )
+        assert tokens <= 100
+        assert "início" in context
+        assert context.endswith("fim")
+        assert "[...]" in context
+
+    def test_tables_become_file_references(self, tmp_path):
+        """Testa que tabelas grandes viram referência para arquivo"""
+        budgeter = ContextBudgeter(max_tokens=200, results_dir=str(tmp_path))
+        table = json.dumps({f"item {i}": {"match": i, "score": 90} for i in range(500)})
+        context, tokens = budgeter.build_context(
+            ["Comparar colunas"], [table], MODEL, prefix="crew"
+        )
+        files = list(tmp_path.iterdir())
+        assert len(files) == 1
+        assert files[0].read_text(encoding="utf-8") == table
+        assert str(files[0]) in context
+        assert tokens <= 200
+
+        # Outra execução com outro conteúdo não sobrescreve o arquivo anterior
+        other = table.replace('"score": 90', '"score": 80')
+        budgeter.build_context(["Comparar colunas"], [other], MODEL, prefix="crew")
+        assert len(list(tmp_path.iterdir())) == 2
+        assert files[0].read_text(encoding="utf-8") == table
+
+    def test_summarizer_is_used_for_text(self):
+        """Testa o uso do resumidor configurado"""
+        budgeter = ContextBudgeter(
+            max_tokens=50, summarizer=lambda text, limit: "resumo curto"
+        )
+        context, _ = budgeter.build_context(
+            ["Ler planilhas"], ["texto " * 500], MODEL, prefix="crew"
+        )
+        assert context == "### Ler planilhas\nresumo curto"
+
+    def test_budget_is_shared_across_steps(self):
+        """Testa que o orçamento total vale para todas as etapas juntas"""
+        budgeter = ContextBudgeter(max_tokens=120)
+        outputs = ["a " * 1000, "b " * 1000, None]
+        context, tokens = budgeter.build_context(
+            ["Etapa 1", "Etapa 2", "Etapa 3"], outputs, MODEL, prefix="crew"
+        )
+        assert tokens <= 125
+        assert "### Etapa 1" in context and "### Etapa 2" in context
+        assert "### Etapa 3" not in context
+
+    def test_looks_tabular(self):
+        """Testa a detecção de saídas tabulares"""
+        assert looks_tabular('[{"a": 1}]')
+        assert looks_tabular("\n".join(f"col{i} | val{i}" for i in range(10)))
+        assert not looks_tabular("Um parágrafo comum de texto.")
+
+
+class TestTokenUsage:
+    """Testes do registro de uso de tokens pelo CrewManager"""
+
+    def test_prompt_is_saved_for_job_results(self, make_crew_manager):
+        """Testa que o resultado do job aponta para o prompt de cada etapa"""
+        manager = make_crew_manager()
+        prompt = "Analisar dados\n\nContexto:\n" + "linha " * 100
+        manager._record_token_usage("Equipe", "Analisar dados", prompt, "c", "ok")
+
+        (usage,) = manager._job_token_usage("Equipe", 1)
+        assert "prompt" not in usage
+        with open(usage["prompt_file"], encoding="utf-8") as saved:
+            assert saved.read() == prompt
+        assert usage["prompt_tokens"] == count_tokens(
+            prompt, manager.config.default_model
+        )
+
+    def test_old_prompt_files_are_pruned(
+        self, make_crew_manager, tmp_path, monkeypatch
+    ):
+        """Testa que só os prompts mais recentes ficam em RESULTS_DIR/prompts"""
+        monkeypatch.setenv("RESULTS_MAX_FILES", "3")
+        manager = make_crew_manager()
+        for i in range(5):
+            path = manager._save_prompt("Equipe", "Etapa", f"prompt {i}")
+            os.utime(path, (i, i))
+
+        files = (tmp_path / "results" / "prompts").iterdir()
+        assert sorted(file.read_text() for file in files) == [
+            "prompt 2",
+            "prompt 3",
+            "prompt 4",
+        ]
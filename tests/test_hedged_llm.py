@@ -0,0 +1,156 @@
+"""
+Testes para o HedgedChatModel usando um LLM falso com latência injetada
+"""
+
+import asyncio
+import time
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.agents.llm import HedgedChatModel, HedgeStats, combine_hedge_stats
+
+
+class FakeChatModel(BaseChatModel):
+    """LLM local que responde após as latências configuradas"""
+
+    reply: str
+    latencies: List[float]
+    calls: int = 0
+    cancelled: int = 0
+    fail: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-latency"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        raise NotImplementedError
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        latency = self.latencies[min(self.calls, len(self.latencies) - 1)]
+        self.calls += 1
+        try:
+            await asyncio.sleep(latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError("falha simulada")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(self.reply))])
+
+
+def hedged(primary, hedge, stats=None, **kwargs):
+    return HedgedChatModel(
+        primary=primary,
+        hedge=hedge,
+        stats=stats or HedgeStats(),
+        model_name="fake",
+        min_samples=5,
+        initial_delay=0.05,
+        **kwargs,
+    )
+
+
+class TestHedgedChatModel:
+    """Testes para a classe HedgedChatModel"""
+
+    def test_fast_primary_does_not_hedge(self):
+        """Testa que respostas rápidas não disparam o hedge"""
+        primary = FakeChatModel(reply="primário", latencies=[0.01])
+        backup = FakeChatModel(reply="fallback", latencies=[0.01])
+        model = hedged(primary, backup)
+
+        assert model.invoke([HumanMessage("oi")]).content == "primário"
+        assert backup.calls == 0
+        assert model.stats.as_dict()["hedged"] == 0
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        """Testa que o hedge vence um primário lento e o cancela"""
+        primary = FakeChatModel(reply="primário", latencies=[2.0])
+        backup = FakeChatModel(reply="fallback", latencies=[0.01])
+        model = hedged(primary, backup)
+
+        start = time.perf_counter()
+        assert model.invoke([HumanMessage("oi")]).content == "fallback"
+        assert time.perf_counter() - start < 1.0
+        assert primary.cancelled == 1
+        stats = model.stats.as_dict()
+        assert stats["hedged"] == 1
+        assert stats["hedge_wins"] == 1
+
+    def test_primary_can_still_win_after_hedge(self):
+        """Testa que o primário vence se terminar antes do hedge"""
+        primary = FakeChatModel(reply="primário", latencies=[0.1])
+        backup = FakeChatModel(reply="fallback", latencies=[2.0])
+        model = hedged(primary, backup)
+
+        assert model.invoke([HumanMessage("oi")]).content == "primário"
+        assert backup.cancelled == 1
+        assert model.stats.as_dict()["hedge_wins"] == 0
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        """Testa que a falha de uma requisição não derruba a outra"""
+        primary = FakeChatModel(reply="primário", latencies=[0.2])
+        backup = FakeChatModel(reply="fallback", latencies=[0.01], fail=True)
+        model = hedged(primary, backup)
+
+        assert model.invoke([HumanMessage("oi")]).content == "primário"
+
+    def test_all_failures_raise(self):
+        """Testa que o erro é propagado quando todas as requisições falham"""
+        primary = FakeChatModel(reply="primário", latencies=[0.1], fail=True)
+        backup = FakeChatModel(reply="fallback", latencies=[0.01], fail=True)
+        model = hedged(primary, backup)
+
+        with pytest.raises(RuntimeError):
+            model.invoke([HumanMessage("oi")])
+
+    def test_hedge_delay_follows_observed_percentile(self):
+        """Testa que o atraso do hedge usa o percentil das latências"""
+        stats = HedgeStats()
+        assert stats.hedge_delay("fake", 0.9, 5, default=3.0) == 3.0
+        for latency in [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]:
+            stats.record("fake", latency, hedged=False, winner="primary")
+        assert stats.hedge_delay("fake", 0.9, 5, default=3.0) == 0.9
+
+    def test_hedge_wins_do_not_collapse_the_delay(self):
+        """Testa que vitórias do hedge mantêm a cauda do primário no percentil"""
+        stats = HedgeStats(window=20)
+        for latency in [0.1] * 9 + [0.5]:
+            stats.record("fake", latency, hedged=False, winner="primary")
+        assert stats.hedge_delay("fake", 0.95, 5, default=3.0) == 0.5
+
+        for _ in range(20):
+            delay = stats.hedge_delay("fake", 0.95, 5, default=3.0)
+            stats.record("fake", 0.1, hedged=False, winner="primary")
+            # Primário lento cancelado quando o hedge respondeu
+            stats.record("fake", delay + 0.01, hedged=True, winner="hedge")
+        assert stats.hedge_delay("fake", 0.95, 5, default=3.0) >= 0.5
+        assert stats.as_dict()["hedge_wins"] == 20
+
+    def test_savings_are_estimated_from_slow_calls(self):
+        """Testa a estimativa de latência economizada"""
+        primary = FakeChatModel(reply="primário", latencies=[0.01] * 5 + [2.0])
+        backup = FakeChatModel(reply="fallback", latencies=[0.01])
+        stats = HedgeStats()
+        for latency in [0.3] * 10 + [1.0]:
+            stats.record("fake", latency, hedged=False, winner="primary")
+        model = hedged(primary, backup, stats=stats, hedge_percentile=0.5)
+
+        for _ in range(6):
+            model.invoke([HumanMessage("oi")])
+        totals = combine_hedge_stats([stats.as_dict()])
+        assert totals["hedged"] == 1
+        assert totals["hedge_wins"] == 1
+        assert 0.5 < totals["saved_seconds"] < 0.7
+        assert totals["hedge_rate"] == pytest.approx(1 / 17)
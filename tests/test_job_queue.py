@@ -0,0 +1,132 @@
+"""
+Testes para a JobQueue e o laço dos workers
+"""
+
+import time
+
+import pytest
+from app.utils.job_queue import JobQueue
+from app.worker import process_job, work
+
+
+class TestJobQueue:
+    """Testes para a classe JobQueue"""
+
+    @pytest.fixture
+    def queue(self, tmp_path):
+        """Fila isolada em diretório temporário"""
+        return JobQueue(
+            db_path=str(tmp_path / "jobs.db"),
+            visibility_timeout=0.2,
+            max_attempts=2,
+            retry_delay=0,
+        )
+
+    def test_enqueue_claim_complete(self, queue):
+        """Testa o ciclo básico de um job"""
+        job_id = queue.enqueue("task", {"task": "Pesquisar"}, crew="crew")
+        job = queue.claim("w1")
+        assert job["id"] == job_id
+        assert job["payload"] == {"task": "Pesquisar"}
+        assert job["status"] == "running"
+        assert queue.claim("w2") is None
+
+        assert queue.complete(job_id, "w1", {"ok": True})
+        assert queue.get(job_id)["result"] == {"ok": True}
+        assert queue.stats()["done"] == 1
+
+    def test_expired_lease_is_redelivered(self, queue):
+        """Testa que o job de um worker que caiu volta para outro worker"""
+        job_id = queue.enqueue("task", {})
+        queue.claim("w1")
+        time.sleep(0.25)
+
+        job = queue.claim("w2")
+        assert job["id"] == job_id
+        assert job["attempts"] == 2
+        # O worker antigo não pode mais confirmar o job
+        assert not queue.complete(job_id, "w1", "atrasado")
+        assert queue.complete(job_id, "w2", "ok")
+
+    def test_heartbeat_extends_lease(self, queue):
+        """Testa que o heartbeat impede a reentrega do job"""
+        job_id = queue.enqueue("task", {})
+        queue.claim("w1")
+        for _ in range(3):
+            time.sleep(0.1)
+            assert queue.heartbeat(job_id, "w1")
+        assert queue.claim("w2") is None
+
+    def test_failures_retry_until_max_attempts(self, queue):
+        """Testa novas tentativas e a falha definitiva"""
+        job_id = queue.enqueue("task", {})
+        queue.claim("w1")
+        queue.fail(job_id, "w1", "erro 1")
+        assert queue.get(job_id)["status"] == "queued"
+
+        queue.claim("w1")
+        queue.fail(job_id, "w1", "erro 2")
+        job = queue.get(job_id)
+        assert job["status"] == "failed"
+        assert job["error"] == "erro 2"
+        assert queue.claim("w1") is None
+
+    def test_expired_lease_without_attempts_fails(self, queue):
+        """Testa que um lease expirado na última tentativa marca falha"""
+        job_id = queue.enqueue("task", {}, max_attempts=1)
+        queue.claim("w1")
+        time.sleep(0.25)
+        assert queue.claim("w2") is None
+        assert queue.get(job_id)["status"] == "failed"
+
+
+class TestWorker:
+    """Testes para o laço dos workers"""
+
+    @pytest.fixture
+    def queue(self, tmp_path):
+        """Fila isolada em diretório temporário"""
+        return JobQueue(db_path=str(tmp_path / "jobs.db"), retry_delay=0)
+
+    def test_work_processes_jobs_in_order(self, queue):
+        """Testa que o worker executa os jobs e grava os resultados"""
+        ids = [queue.enqueue("task", {"n": n}) for n in range(3)]
+        processed = work(queue, lambda job: job["payload"]["n"] * 2, "w1", max_jobs=3)
+        assert processed == 3
+        assert [queue.get(job_id)["result"] for job_id in ids] == [0, 2, 4]
+        assert queue.list_workers()[0]["processed"] == 3
+
+    def test_idle_polls_reuse_worker_stats(self, queue):
+        """Testa que as métricas do worker só são recalculadas após cada job"""
+        calls = []
+
+        def stats():
+            calls.append(time.time())
+            return {"jobs": len(calls)}
+
+        queue.enqueue("task", {"n": 1})
+        polls = iter([None, None, queue.claim("w1"), None, None])
+        processed = work(
+            queue,
+            lambda job: "ok",
+            "w1",
+            poll_interval=0,
+            max_jobs=1,
+            stats=stats,
+            claim=lambda worker_id: next(polls),
+        )
+        assert processed == 1
+        assert len(calls) == 2
+        assert queue.list_workers()[0]["stats"] == {"jobs": 2}
+
+    def test_process_job_records_errors(self, queue):
+        """Testa que exceções do handler viram falha com nova tentativa"""
+        job_id = queue.enqueue("task", {})
+
+        def handler(job):
+            raise ValueError("quebrou")
+
+        assert not process_job(queue, queue.claim("w1"), handler, "w1")
+        job = queue.get(job_id)
+        assert job["status"] == "queued"
+        assert job["error"] == "ValueError: quebrou"
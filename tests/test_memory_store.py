@@ -0,0 +1,117 @@
+"""
+Testes para o MemoryStore
+"""
+
+import time
+
+import pytest
+from app.crews.memory import MemoryStore, combine_memory_stats
+
+
+class TestMemoryStore:
+    """Testes para a classe MemoryStore"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Armazenamento isolado em diretório temporário"""
+        return MemoryStore(
+            db_path=str(tmp_path / "memory.db"), max_items_per_crew=5, batch_size=4
+        )
+
+    def test_save_is_batched(self, store):
+        """Testa que as gravações ficam pendentes até completar o lote"""
+        calls = []
+        embedder = store.embedder
+        store.embedder = lambda texts: calls.append(len(texts)) or embedder(texts)
+
+        for i in range(3):
+            store.save("crew", "short_term", f"item {i}")
+        assert calls == []
+
+        store.save("crew", "short_term", "item 3")
+        assert calls == [4]
+
+    def test_search_returns_top_k(self, store):
+        """Testa a busca por similaridade limitada ao top-k"""
+        store.save("crew", "short_term", "planilha de custos de obra")
+        store.save("crew", "short_term", "relatório de pesquisa sobre IA")
+        store.save("crew", "short_term", "custos da planilha de obra revisada")
+
+        results = store.search("crew", "short_term", "planilha custos obra", limit=2)
+        assert len(results) == 2
+        assert all("planilha" in result["context"] for result in results)
+        assert results[0]["metadata"]["score"] >= results[1]["metadata"]["score"]
+
+    def test_search_is_isolated_per_crew(self, store):
+        """Testa que uma crew não enxerga a memória de outra"""
+        store.save("crew_a", "short_term", "dados confidenciais")
+        assert store.search("crew_b", "short_term", "dados confidenciais") == []
+
+    def test_lru_eviction_respects_cap(self, store):
+        """Testa que o limite por crew remove os itens menos usados"""
+        store.save("crew", "short_term", "memória importante")
+        store.flush()
+        time.sleep(0.01)
+
+        for i in range(4):
+            store.save("crew", "short_term", f"ruído {i}")
+        store.flush()
+        time.sleep(0.01)
+        store.search("crew", "short_term", "memória importante", limit=1)
+
+        for i in range(4, 8):
+            store.save("crew", "short_term", f"ruído {i}")
+        store.flush()
+
+        assert store.count("crew") == 5
+        results = store.search("crew", "short_term", "memória importante", limit=1)
+        assert results[0]["context"] == "memória importante"
+
+    def test_ttl_eviction(self, tmp_path):
+        """Testa a remoção de memórias expiradas"""
+        store = MemoryStore(db_path=str(tmp_path / "ttl.db"), ttl_seconds=0.01)
+        store.save("crew", "short_term", "antigo")
+        store.flush()
+        time.sleep(0.05)
+        assert store.evict("crew") == 1
+        assert store.count("crew") == 0
+
+    def test_long_term_load_latest(self, store):
+        """Testa a recuperação da memória de longo prazo por tarefa"""
+        store.save("crew", "long_term", "tarefa", {"score": 1})
+        store.save("crew", "long_term", "tarefa", {"score": 2})
+        store.save("crew", "long_term", "outra", {"score": 3})
+
+        rows = store.load_latest("crew", "long_term", "tarefa", latest_n=1)
+        assert rows == [{"score": 2}]
+
+    def test_delete_crew_and_stats(self, store):
+        """Testa a remoção das memórias de uma crew e as métricas"""
+        store.save("crew", "short_term", "algo")
+        store.search("crew", "short_term", "algo")
+        stats = store.get_stats()
+        assert stats["items"] == 1
+        assert stats["size_bytes"] > 0
+        assert stats["retrievals"] == 1
+
+        store.delete_crew("crew")
+        assert store.count() == 0
+
+    def test_combine_stats_from_workers(self):
+        """Testa a junção das métricas de recuperação publicadas pelos workers"""
+        local = {"items": 3, "size_bytes": 100, "retrievals": 0}
+        worker1 = {
+            "items": 3,
+            "size_bytes": 100,
+            "retrieval_avg_ms": 2.0,
+            "retrieval_p95_ms": 4.0,
+            "retrievals": 1,
+        }
+        worker2 = dict(
+            worker1, retrieval_avg_ms=5.0, retrieval_p95_ms=9.0, retrievals=3
+        )
+        stats = combine_memory_stats([local, worker1, worker2, {}])
+        assert stats["items"] == 3
+        assert stats["retrievals"] == 4
+        assert stats["retrieval_avg_ms"] == pytest.approx(4.25)
+        assert stats["retrieval_p95_ms"] == 9.0
@@ -0,0 +1,167 @@
+"""
+Testes para o pipeline em lotes e retomável de comparação de planilhas
+"""
+
+import csv
+import os
+import random
+import shutil
+import string
+
+import pandas as pd
+import pytest
+
+from app.utils.planilhas import PlanilhasPipeline, iter_excel_column
+from app.utils.tools import compare_text_similarity, read_excel_column
+
+
+def random_texts(count, seed):
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + "áéçã ,."
+    return [
+        " ".join(
+            "".join(rng.choices(alphabet, k=rng.randint(2, 7)))
+            for _ in range(rng.randint(1, 3))
+        )
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture
+def planilhas(tmp_path):
+    file1 = tmp_path / "a.xlsx"
+    file2 = tmp_path / "b.xlsx"
+    pd.DataFrame({"nome": random_texts(53, seed=1)}).to_excel(file1, index=False)
+    pd.DataFrame({"ref": random_texts(80, seed=2)}).to_excel(file2, index=False)
+    return str(file1), str(file2)
+
+
+def make_pipeline(tmp_path, planilhas, **kwargs):
+    file1, file2 = planilhas
+    return PlanilhasPipeline(
+        file1, "nome", file2, "ref", work_dir=str(tmp_path / "work"), **kwargs
+    )
+
+
+def read_output(path):
+    with open(path, encoding="utf-8", newline="") as output:
+        return list(csv.DictReader(output))
+
+
+class TestPlanilhasPipeline:
+    """Testes para a classe PlanilhasPipeline"""
+
+    def test_streamed_column_matches_pandas(self, tmp_path, planilhas):
+        """Testa que a leitura em streaming equivale a read_excel_column"""
+        file1, _ = planilhas
+        assert list(iter_excel_column(file1, "nome")) == read_excel_column(
+            file1, "nome"
+        )
+        assert (
+            list(iter_excel_column(file1, "nome", start=50))
+            == read_excel_column(file1, "nome")[50:]
+        )
+        with pytest.raises(ValueError):
+            list(iter_excel_column(file1, "inexistente"))
+
+    def test_results_match_compare_text_similarity(self, tmp_path, planilhas):
+        """Testa que o pipeline em lotes dá o mesmo resultado da versão original"""
+        file1, file2 = planilhas
+        progress = []
+        pipeline = make_pipeline(
+            tmp_path, planilhas, batch_size=10, on_progress=progress.append
+        )
+        result = pipeline.run()
+        # O checkpoint é apagado ao final; só o CSV do resultado fica
+        assert not pipeline.checkpoint_dir.exists()
+
+        expected = compare_text_similarity(
+            read_excel_column(file1, "nome"), read_excel_column(file2, "ref")
+        )
+        rows = read_output(result["output_file"])
+        assert result["rows"] == len(rows) == 53
+        assert result["batches"] == 6
+        for row in rows:
+            assert row["correspondencia"] == expected[row["texto"]]["match"]
+            assert int(row["pontuacao"]) == expected[row["texto"]]["score"]
+
+        stages = [p["stage"] for p in progress]
+        assert stages[0] == "index" and stages[-1] == "done"
+        rows_done = [p["rows_done"] for p in progress if p["stage"] == "match"]
+        assert rows_done == [10, 20, 30, 40, 50, 53]
+        assert progress[1]["rows_total"] == 53
+        assert progress[1]["eta_seconds"] is not None
+
+    def test_resumes_from_last_checkpoint(self, tmp_path, planilhas):
+        """Testa a retomada após uma interrupção no meio do processamento"""
+
+        class Interrupted(Exception):
+            pass
+
+        def interrupt(progress):
+            if progress["stage"] == "match" and progress["batches_done"] == 2:
+                raise Interrupted()
+
+        pipeline = make_pipeline(
+            tmp_path, planilhas, batch_size=10, on_progress=interrupt
+        )
+        with pytest.raises(Interrupted):
+            pipeline.run()
+        assert pipeline.load_state()["rows_done"] == 20
+
+        # Linhas gravadas após o checkpoint são descartadas na retomada
+        with open(pipeline.output_path, "a", encoding="utf-8") as output:
+            output.write("99,parcial,,0\n")
+
+        result = make_pipeline(tmp_path, planilhas, batch_size=10).run()
+        assert result["resumed_from_row"] == 20
+        rows = read_output(result["output_file"])
+        assert [int(row["linha"]) for row in rows] == list(range(1, 54))
+
+        fresh = make_pipeline(tmp_path / "novo", planilhas, batch_size=10).run()
+        assert read_output(fresh["output_file"]) == rows
+
+
+class TestPlanilhasJobs:
+    """Testes dos jobs de comparação de planilhas no CrewManager"""
+
+    @pytest.fixture
+    def manager(self, make_crew_manager, monkeypatch):
+        monkeypatch.setenv("PLANILHAS_BATCH_SIZE", "10")
+        return make_crew_manager()
+
+    def upload(self, manager, path):
+        uploads = manager.config.data_dir / "uploads"
+        uploads.mkdir(parents=True, exist_ok=True)
+        target = uploads / f"enviado_{os.path.basename(path)}"
+        shutil.copy(path, target)
+        return str(target)
+
+    def test_uploads_are_removed_after_done(self, manager, planilhas):
+        """Testa que as planilhas enviadas são apagadas quando o job termina"""
+        file1, file2 = (self.upload(manager, path) for path in planilhas)
+        manager.submit_planilhas("Equipe", file1, "nome", file2, "ref")
+        job = manager.admission.claim("w1")
+
+        result = manager.run_job(job)
+        assert result["rows"] == 53
+        assert os.path.exists(result["output_file"])
+        assert not os.path.exists(file1) and not os.path.exists(file2)
+        # Planilhas fora de DATA_DIR/uploads nunca são apagadas
+        assert all(os.path.exists(path) for path in planilhas)
+
+    def test_checkpoint_is_kept_until_last_attempt(self, manager, planilhas):
+        """Testa que o checkpoint só é apagado quando não há mais tentativas"""
+        file1, file2 = (self.upload(manager, path) for path in planilhas)
+        manager.submit_planilhas("Equipe", file1, "inexistente", file2, "ref")
+        job = manager.admission.claim("w1")
+        work_dir = manager.config.planilhas_dir
+
+        with pytest.raises(ValueError):
+            manager.run_job(job)
+        assert os.path.exists(file1) and os.listdir(work_dir)
+
+        with pytest.raises(ValueError):
+            manager.run_job(dict(job, attempts=job["max_attempts"]))
+        assert not os.path.exists(file1) and not os.path.exists(file2)
+        assert os.listdir(work_dir) == []
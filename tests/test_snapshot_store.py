@@ -0,0 +1,139 @@
+"""
+Testes para os snapshots versionados de crews e agentes
+"""
+
+import pytest
+
+from app.agents.agent_manager import AgentManager
+from app.crews.snapshot import SnapshotStore, benchmark_startup
+from app.utils.config import Config
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / "snapshots.db"), keep_versions=2)
+
+
+class TestSnapshotStore:
+    """Testes para a classe SnapshotStore"""
+
+    def test_versions_only_grow_on_changes(self, store):
+        """Testa que configurações iguais não geram nova versão"""
+        assert store.save("crew", "a", {"x": 1}) == 1
+        assert store.save("crew", "a", {"x": 1}) == 1
+        assert store.save("crew", "a", {"x": 2}) == 2
+        assert store.load_latest("crew") == {"a": {"x": 2}}
+        assert [h["version"] for h in store.history("crew", "a")] == [2, 1]
+
+    def test_restore_previous_version(self, store):
+        """Testa a restauração de uma versão anterior"""
+        store.save("crew", "a", {"x": 1})
+        store.save("crew", "a", {"x": 2})
+        assert store.restore("crew", "a", 1) == {"x": 1}
+        assert store.load_latest("crew") == {"a": {"x": 1}}
+        assert store.history("crew", "a")[0]["version"] == 3
+
+    def test_compact_drops_deleted_and_old_versions(self, store):
+        """Testa a compactação de tombstones e versões antigas"""
+        for value in range(4):
+            store.save("crew", "a", {"x": value})
+        store.save("crew", "b", {"x": 0})
+        store.delete("crew", "b")
+        assert store.load_latest("crew") == {"a": {"x": 3}}
+        assert store.stale_count() == 4
+
+        assert store.compact() == 4
+        assert store.count() == 2
+        assert store.load_latest("crew") == {"a": {"x": 3}}
+        assert store.stale_count() == 0
+
+
+class TestCrewSnapshots:
+    """Testes da restauração de crews pelo CrewManager"""
+
+    def test_warm_start_restores_lazily(self, make_crew_manager, store, monkeypatch):
+        """Testa que a crew restaurada só é materializada na primeira execução"""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        manager = make_crew_manager(store)
+        assert manager.create_crew("Equipe", ["writer"], "desc") is not None
+        created_at = manager.get_crew_info("Equipe")["created_at"]
+        assert created_at != "2024-01-01"
+
+        restarted = make_crew_manager(store)
+        assert restarted.list_crew_names() == ["Equipe"]
+        assert restarted.get_crew_info("Equipe")["created_at"] == created_at
+        assert restarted.get_all_crews() == {}
+        assert restarted.get_crew("Equipe") is not None
+        assert list(restarted.get_all_crews()) == ["Equipe"]
+
+    def test_deleted_crews_are_not_restored(
+        self, make_crew_manager, store, monkeypatch
+    ):
+        """Testa que delete_crew grava um tombstone removido na compactação"""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        manager = make_crew_manager(store)
+        manager.create_crew("Equipe", ["writer"])
+        assert manager.delete_crew("Equipe")
+
+        assert make_crew_manager(store).list_crew_names() == []
+        manager.compact_snapshots()
+        assert store.count("crew") == 0
+
+    def test_queued_job_does_not_restore_deleted_crew(
+        self, make_crew_manager, store, monkeypatch
+    ):
+        """Testa que um job na fila não recria a crew excluída depois do envio"""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        worker = make_crew_manager(store)
+        ui = make_crew_manager(store)
+        ui.create_crew("Equipe", ["writer"])
+        ui.submit_crew_task("Equipe", "Escrever um resumo")
+        assert ui.delete_crew("Equipe")
+
+        job = worker.admission.claim("w1")
+        worker._ensure_crew(job["crew"], job["payload"]["crew_config"])
+        assert worker.get_crew("Equipe") is not None
+        assert make_crew_manager(store).list_crew_names() == []
+
+    def test_compaction_failure_does_not_skip_restore(
+        self, make_crew_manager, store, monkeypatch
+    ):
+        """Testa que uma falha na compactação não impede a restauração das crews"""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        make_crew_manager(store).create_crew("Equipe", ["writer"])
+
+        def locked():
+            raise RuntimeError("database is locked")
+
+        monkeypatch.setenv("SNAPSHOT_COMPACT_THRESHOLD", "-1")
+        monkeypatch.setattr(store, "compact", locked)
+        assert make_crew_manager(store).list_crew_names() == ["Equipe"]
+
+    def test_agent_defaults_follow_code(self, make_crew_manager, store, monkeypatch):
+        """Testa que só as personalizações dos agentes são salvas"""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        make_crew_manager(store).create_crew("Equipe", ["excel_analyst"])
+        assert store.load_latest("agent") == {}
+
+        manager = AgentManager(Config(), snapshot_store=store)
+        manager.agent_tools["excel_analyst"].append("statistical_analysis")
+        agent = manager.create_agent("excel_analyst")
+        assert [tool.name for tool in agent.tools] == [
+            "read_excel",
+            "compare_text",
+            "statistical_analysis",
+        ]
+
+        manager.create_agent("writer", goal="Escrever atas")
+        restored = AgentManager(Config(), snapshot_store=store)
+        assert store.load_latest("agent") == {"writer": {"goal": "Escrever atas"}}
+        assert restored.create_agent("writer").goal == "Escrever atas"
+        assert restored.get_agent_tools("writer") == ["text_formatter"]
+
+    def test_startup_benchmark_with_1000_crews(self, monkeypatch):
+        """Testa que a inicialização com 1.000 crews salvas não as materializa"""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        result = benchmark_startup(num_crews=1000, sample=2)
+        assert result["crews"] == 1000
+        assert result["restore_seconds"] < 2.0
+        assert result["eager_seconds_estimate"] > result["restore_seconds"]
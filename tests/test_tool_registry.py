@@ -0,0 +1,142 @@
+"""
+Testes para o registro de ferramentas e a camada de execução compartilhada
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Type
+
+import pandas as pd
+from langchain_core.pydantic_v1 import BaseModel, Field
+
+from app.agents.agent_manager import AgentManager
+from app.agents.tool_registry import (
+    RegisteredTool,
+    ToolExecutor,
+    ToolRegistry,
+    combine_tool_stats,
+)
+
+
+class SlowInput(BaseModel):
+    value: str = Field(description="Valor qualquer")
+
+
+class SlowTool(RegisteredTool):
+    """Ferramenta de teste que conta execuções e demora o tempo configurado"""
+
+    name: str = "slow"
+    description: str = "Ferramenta lenta de teste"
+    args_schema: Type[BaseModel] = SlowInput
+    delay: float = 0.0
+    executions: int = 0
+
+    def execute(self, value: str) -> str:
+        self.executions += 1
+        time.sleep(self.delay)
+        return value.upper()
+
+
+class TestToolExecutor:
+    """Testes para a classe ToolExecutor"""
+
+    def test_results_are_cached_by_arguments(self):
+        """Testa que argumentos iguais reaproveitam o resultado"""
+        tool = SlowTool(executor=ToolExecutor())
+        assert tool.run({"value": "a"}) == "A"
+        assert tool.run({"value": "a"}) == "A"
+        assert tool.run({"value": "b"}) == "B"
+        assert tool.executions == 2
+        sources = [call["source"] for call in tool.executor.calls]
+        assert sources == ["execução", "cache", "execução"]
+
+    def test_timeout_returns_error_message(self):
+        """Testa que ferramentas lentas respeitam o tempo limite"""
+        tool = SlowTool(executor=ToolExecutor(), delay=0.5, timeout=0.05)
+        start = time.perf_counter()
+        result = tool.run({"value": "a"})
+        assert time.perf_counter() - start < 0.4
+        assert "tempo limite" in result
+        assert tool.executor.calls[-1]["status"] == "timeout"
+
+    def test_timed_out_calls_do_not_block_the_pool(self):
+        """Testa que chamadas travadas não ocupam as threads das seguintes"""
+        executor = ToolExecutor(max_workers=1)
+        hung = SlowTool(executor=executor, delay=1.0, timeout=0.05)
+        fast = SlowTool(executor=executor, name="fast", timeout=0.5)
+
+        assert "tempo limite" in hung.run({"value": "a"})
+        start = time.perf_counter()
+        assert fast.run({"value": "b"}) == "B"
+        assert time.perf_counter() - start < 0.4
+        assert executor.calls[-1]["status"] == "ok"
+        assert executor.replaced_pools == 1
+
+    def test_repeated_calls_are_batched_within_kickoff(self):
+        """Testa que chamadas simultâneas idênticas executam uma única vez"""
+        executor = ToolExecutor()
+        tool = SlowTool(executor=executor, delay=0.2, cacheable=False)
+        with executor.kickoff_scope():
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                results = list(pool.map(lambda _: tool.run({"value": "x"}), range(3)))
+        assert results == ["X", "X", "X"]
+        assert tool.executions == 1
+
+        # Fora do kickoff, ferramentas não cacheáveis voltam a executar
+        tool.run({"value": "x"})
+        assert tool.executions == 2
+
+    def test_summary_reports_runtime_per_tool(self):
+        """Testa o resumo de chamadas por ferramenta"""
+        tool = SlowTool(executor=ToolExecutor())
+        tool.run({"value": "a"})
+        tool.run({"value": "a"})
+        summary = tool.executor.summary()
+        assert summary["slow"]["calls"] == 2
+        assert summary["slow"]["reused"] == 1
+        totals = combine_tool_stats([summary, summary])
+        assert totals["slow"]["calls"] == 4
+
+
+class TestToolRegistry:
+    """Testes para a classe ToolRegistry"""
+
+    def test_agent_tools_resolve_to_real_tools(self):
+        """Testa que todas as ferramentas dos agentes estão registradas"""
+        manager = AgentManager()
+        registry = manager.tool_registry
+        for agent_type in manager.list_available_agent_types():
+            names = manager.get_agent_tools(agent_type)
+            tools = registry.resolve(names)
+            assert [tool.name for tool in tools] == names
+
+    def test_excel_tools_wrap_utilities(self, tmp_path):
+        """Testa read_excel e compare_text com uma planilha real"""
+        path = tmp_path / "dados.xlsx"
+        pd.DataFrame({"nome": ["Maria Silva", "João Souza"]}).to_excel(
+            path, index=False
+        )
+        registry = ToolRegistry()
+        values = registry.get("read_excel").run(
+            {"file_path": str(path), "column_name": "nome"}
+        )
+        assert values == ["Maria Silva", "João Souza"]
+
+        matches = registry.get("compare_text").run(
+            {"list1": ["Silva Maria"], "list2": values}
+        )
+        assert matches["Silva Maria"]["match"] == "Maria Silva"
+
+    def test_file_changes_invalidate_cache(self, tmp_path):
+        """Testa que a data de modificação do arquivo entra na chave do cache"""
+        path = tmp_path / "dados.xlsx"
+        pd.DataFrame({"nome": ["a"]}).to_excel(path, index=False)
+        tool = ToolRegistry().get("read_excel")
+        args = {"file_path": str(path), "column_name": "nome"}
+        assert tool.run(args) == ["a"]
+
+        pd.DataFrame({"nome": ["b"]}).to_excel(path, index=False)
+        stat = path.stat()
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+        assert tool.run(args) == ["b"]
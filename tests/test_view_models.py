@@ -0,0 +1,101 @@
+"""
+Testes para os view models memoizados e a medição de tempo da interface
+"""
+
+from app.agents.agent_manager import AgentManager
+from app.utils.view_models import (
+    RenderTimer,
+    ViewModelCache,
+    build_agent_rows,
+    build_crew_rows,
+)
+
+
+class FakeCrewManager:
+    """Gerenciador mínimo com versão de estado"""
+
+    def __init__(self):
+        self.version = 0
+        self.crew_configs = {}
+        self.reads = 0
+
+    def add(self, name, agent_types):
+        self.crew_configs[name] = {"agent_types": agent_types, "workflow": None}
+        self.version += 1
+
+    def list_crew_names(self):
+        return list(self.crew_configs)
+
+    def get_crew_info(self, name):
+        self.reads += 1
+        return self.crew_configs.get(name)
+
+
+class TestViewModelCache:
+    """Testes para a classe ViewModelCache"""
+
+    def test_rebuilds_only_when_version_changes(self):
+        """Testa que o view model é reaproveitado enquanto a versão não muda"""
+        crews = FakeCrewManager()
+        agents = AgentManager()
+        for i in range(100):
+            crews.add(f"crew{i}", ["writer"])
+        cache = ViewModelCache()
+
+        def build():
+            return build_crew_rows(crews, agents)
+
+        rows = cache.get("crews", crews.version, build)
+        assert len(rows) == 100
+        assert rows[0]["agents"] == "Escritor de conteúdo"
+        assert cache.get("crews", crews.version, build) is rows
+        assert crews.reads == 100
+
+        crews.add("nova", ["analyst"])
+        rows = cache.get("crews", crews.version, build)
+        assert len(rows) == 101
+        assert crews.reads == 201
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_agent_rows_track_created_agents(self):
+        """Testa o view model de agentes"""
+        rows = build_agent_rows(AgentManager())
+        assert {row["type"] for row in rows} >= {"researcher", "excel_analyst"}
+        excel = next(row for row in rows if row["type"] == "excel_analyst")
+        assert excel["tools"] == "read_excel, compare_text"
+        assert excel["created"] is False
+
+
+class TestRenderTimer:
+    """Testes para a classe RenderTimer"""
+
+    def test_sections_are_recorded_per_run(self):
+        """Testa o registro de seções em reruns completos e parciais"""
+        timer = RenderTimer()
+        timer.start_run()
+        with timer.section("Dashboard") as timing:
+            pass
+        timer.end_run()
+        assert timing["ms"] >= 0
+        assert list(timer.last_full_run()["sections"]) == ["Dashboard"]
+
+        # Rerun de um fragmento, fora de um rerun completo
+        with timer.section("Histórico"):
+            pass
+        assert timer.recent()[0]["scope"] == "Histórico"
+        assert timer.last_full_run()["scope"] == "app"
+
+    def test_full_run_survives_many_partial_reruns(self):
+        """Testa que reruns de fragmentos não apagam o último rerun completo"""
+        timer = RenderTimer(history=20)
+        timer.start_run()
+        with timer.section("Dashboard"):
+            pass
+        timer.end_run()
+
+        # Cerca de 60 s de histórico atualizando a cada 3 s
+        for _ in range(25):
+            with timer.section("Histórico"):
+                pass
+        assert all(run["scope"] == "Histórico" for run in timer.recent())
+        assert list(timer.last_full_run()["sections"]) == ["Dashboard"]